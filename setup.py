@@ -21,6 +21,9 @@ setup(
             'ipdb',
             'nose2',
             "parameterized",
+        ],
+        'fast': [
+            "orjson==3.10.18",
         ]
     },
     entry_points="""
@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
+import sys
+
 import singer
 from singer import utils as _utils
 from tap_typeform.discover import discover as _discover
-from tap_typeform.sync import sync as _sync
-from tap_typeform.client import Client
 from tap_typeform.streams import Forms
 
 REQUIRED_CONFIG_KEYS = ["start_date", "token"]
@@ -14,9 +14,15 @@ class FormMistmatchError(Exception):
     pass
 
 
+def _sync(client, config, state, catalog, forms_to_sync):
+    # The sync modules are imported by the sync only, to keep discover fast
+    from tap_typeform.sync import sync
+    sync(client, config, state, catalog, forms_to_sync)
+
+
 def validate_form_ids(client, config):
     """Validate the form ids passed in the config"""
-    form_stream = Forms()
+    form_stream = Forms(config)
 
     api_forms = {form.get('id') for res in form_stream.get_forms(client) for form in res if form}
     if not config.get('forms'):
@@ -36,20 +42,40 @@ def validate_form_ids(client, config):
 
 @_utils.handle_top_exception(LOGGER)
 def main():
+    # `--shard i/N`, `--profile` and `--plan` are not standard Singer arguments, they are removed before parsing the others
+    from tap_typeform import profiling, shard
+    shard_arg = shard.pop_shard_arg(sys.argv)
+    profile_arg = profiling.pop_profile_arg(sys.argv)
+    plan_arg = '--plan' in sys.argv
+    if plan_arg:
+        sys.argv.remove('--plan')
     args = _utils.parse_args(REQUIRED_CONFIG_KEYS)
     config = args.config
+    if shard_arg:
+        config['shard'] = shard_arg
+    if profile_arg:
+        config['profile'] = profile_arg
+    if plan_arg:
+        config['plan'] = True
 
     if args.dev:
         LOGGER.warning("Executing Tap in Dev mode")
 
-    client = Client(config, args.config_path, args.dev)
-    valid_forms = validate_form_ids(client, config)
+    # Discover only reads the schema files, the API is not requested
     if args.discover:
         catalog = _discover()
         catalog.dump()
+        return
+
+    from tap_typeform.client import Client
+    client = Client(config, args.config_path, args.dev)
+    valid_forms = validate_form_ids(client, config)
+    catalog = args.catalog \
+        if args.catalog else _discover()
+    if config.get('plan'):
+        from tap_typeform import planner
+        planner.print_plan(client, config, args.state, catalog.to_dict(), valid_forms)
     else:
-        catalog = args.catalog \
-            if args.catalog else _discover()
         _sync(client, config, args.state, catalog.to_dict(), valid_forms)
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+import time
+
+import pendulum
+import singer
+from tap_typeform import run_control, run_report, state_store
+from tap_typeform.streams import STREAMS, RESUME_KEY, get_bookmark, write_bookmarks
+
+
+LOGGER = singer.get_logger()
+
+BACKFILL_KEY = 'backfill'
+
+
+def get_family(stream_name):
+    """
+    Return the stream and its children, which share the responses of the form.
+    """
+    return [stream_name] + STREAMS[stream_name].children
+
+
+def has_bookmarks(state, stream_name, form_id, selected_streams):
+    return any(singer.bookmarks.get_bookmark(state, name, form_id)
+               for name in get_family(stream_name) if name in selected_streams)
+
+
+def add_window(lane, stream_name, form_id, since, until):
+    """
+    Add the responses of the form between `since` and `until`(a unix timestamp) to the lane.
+    The window has its own bookmarks, starting at `since`, and its own page checkpoints.
+    """
+    bookmark_key = STREAMS[stream_name].replication_keys[0]
+    lane['windows'].setdefault(stream_name, {})[form_id] = {
+        'until': until,
+        'state': {'bookmarks': {name: {form_id: {bookmark_key: since}} for name in get_family(stream_name)}},
+    }
+
+
+def plan(state, forms_to_sync, responses_streams, selected_streams, start_date, now):
+    """
+    Move the history of new forms, and the history added by moving the start date back,
+    to the backfill lane. New forms are bookmarked at the start of the run, so their
+    incremental sync only fetches the responses submitted from then on.
+    """
+    lane = state.setdefault(BACKFILL_KEY, {'start_date': start_date, 'windows': {}})
+    current_time = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+    until = int(now.timestamp()) - 1
+    moved_back = start_date < lane['start_date']
+
+    windows_count = 0
+    for stream_name in responses_streams:
+        stream_windows = lane['windows'].get(stream_name, {})
+        for form_id in forms_to_sync:
+            if form_id in stream_windows:
+                continue
+            if not has_bookmarks(state, stream_name, form_id, selected_streams):
+                add_window(lane, stream_name, form_id, start_date, until)
+                write_bookmarks(stream_name, selected_streams, form_id, current_time, state)
+                windows_count += 1
+            elif moved_back:
+                add_window(lane, stream_name, form_id, start_date,
+                           int(pendulum.parse(lane['start_date']).timestamp()) - 1)
+                windows_count += 1
+
+    lane['start_date'] = min(start_date, lane['start_date'])
+    if windows_count:
+        LOGGER.info('Added %d forms to the backfill lane', windows_count)
+        state_store.record_value(BACKFILL_KEY)
+    return lane
+
+
+def sync_lane(client, state, catalogs, forms_to_sync, config, selected_streams, records_count):
+    """
+    Work through the backfill windows, newest responses first, until the page or time budget
+    of the lane is used. A window stopped by the budget continues from its page checkpoint
+    in the next run. Returns the number of pages fetched.
+    """
+    lane = state.get(BACKFILL_KEY)
+    if not lane:
+        return 0
+
+    max_pages = int(config.get('backfill_max_pages') or 0)
+    max_seconds = float(config.get('backfill_max_seconds') or 0)
+    # The lane has its own budget, the page budget of the incremental forms does not apply
+    lane_config = {**config, 'form_page_budget': 0}
+    started = time.monotonic()
+    pages = 0
+
+    def budget_used():
+        return (max_pages and pages >= max_pages) or (max_seconds and time.monotonic() - started >= max_seconds) \
+            or run_control.should_stop()
+
+    windows = [(stream_name, form_id, stream_windows)
+               for stream_name, stream_windows in lane['windows'].items()
+               for form_id in forms_to_sync if form_id in stream_windows]
+    for stream_name, form_id, stream_windows in windows:
+        if budget_used():
+            LOGGER.info('Backfill lane budget used after %d pages', pages)
+            break
+
+        window = stream_windows[form_id]
+        window_state = window['state']
+        stream_obj = STREAMS[stream_name](lane_config)
+        since = get_bookmark(window_state, stream_name, form_id, stream_obj.replication_keys[0], None)
+        stream_obj.start_form(client, window_state, catalogs, form_id, since, selected_streams, records_count)
+        stream_obj.request_params['until'] = window['until']
+        with run_report.track(stream_name, form_id):
+            while not stream_obj.form_done and not budget_used():
+                stream_obj.sync_page()
+                pages += 1
+        stream_obj.finish_form()
+
+        if not window_state.get(RESUME_KEY, {}).get(stream_name, {}).get(form_id):
+            LOGGER.info('Backfill of stream %s - form: %s is complete', stream_name, form_id)
+            del stream_windows[form_id]
+        state_store.record_value(BACKFILL_KEY)
+        state_store.checkpoint(state)
+
+    lane['windows'] = {stream_name: stream_windows for stream_name, stream_windows in lane['windows'].items()
+                       if stream_windows}
+    return pages
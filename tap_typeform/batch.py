@@ -0,0 +1,141 @@
+import gzip
+import os
+import uuid
+
+import singer
+
+
+LOGGER = singer.get_logger()
+
+BATCH_STREAMS = ['submitted_landings', 'unsubmitted_landings', 'answers']
+BATCH_MAX_BYTES = 100 * 1024 * 1024
+BATCH_FORMATS = {
+    'jsonl': ['gzip', 'zstd'],
+    'parquet': ['snappy', 'gzip', 'zstd'],
+}
+FILE_EXTENSIONS = {
+    'gzip': 'jsonl.gz',
+    'zstd': 'jsonl.zst',
+}
+
+
+class JSONLBatchFile:
+    """
+    Compressed JSON lines file holding one record per line.
+    """
+
+    def __init__(self, path, compression):
+        self.path = path
+        if compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError as err:
+                raise Exception("The `zstandard` package is required for zstd compressed batches.") from err
+            self.raw_file = open(path, 'wb')
+            self.file = zstandard.ZstdCompressor().stream_writer(self.raw_file)
+        else:
+            self.raw_file = None
+            self.file = gzip.open(path, 'wb')
+
+    def write(self, data, record):
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+        if self.raw_file is not None:
+            self.raw_file.close()
+
+
+class ParquetBatchFile:
+    """
+    Parquet file, records are kept in memory and written as one table when the file is closed.
+    """
+
+    def __init__(self, path, compression):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as err:
+            raise Exception("The `pyarrow` package is required for parquet batches.") from err
+        self.pyarrow = pyarrow
+        self.parquet = pyarrow.parquet
+        self.path = path
+        self.compression = compression
+        self.records = []
+
+    def write(self, data, record):
+        self.records.append(record)
+
+    def close(self):
+        table = self.pyarrow.Table.from_pylist(self.records)
+        self.parquet.write_table(table, self.path, compression=self.compression)
+
+
+class BatchWriter:
+    """
+    Writes the records of the batch streams to local files instead of RECORD messages.
+    A file is rolled over once `max_bytes` bytes of serialized records are written to it,
+    and a BATCH message pointing to the file is returned when it is finalized.
+    """
+
+    def __init__(self, batch_dir, batch_format='jsonl', compression=None, max_bytes=BATCH_MAX_BYTES,
+                 streams=BATCH_STREAMS):
+        if batch_format not in BATCH_FORMATS:
+            raise Exception("Invalid batch format {}, it should be one of {}.".format(batch_format, list(BATCH_FORMATS)))
+        compression = compression or BATCH_FORMATS[batch_format][0]
+        if compression not in BATCH_FORMATS[batch_format]:
+            raise Exception("Invalid compression {} for {} batches, it should be one of {}.".format(
+                compression, batch_format, BATCH_FORMATS[batch_format]))
+
+        self.batch_dir = os.path.abspath(batch_dir)
+        self.batch_format = batch_format
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.streams = set(streams)
+        self.files = {}
+        self.file_bytes = {}
+        os.makedirs(self.batch_dir, exist_ok=True)
+
+    def has_open_batches(self):
+        return bool(self.files)
+
+    def _open(self, stream_name):
+        extension = 'parquet' if self.batch_format == 'parquet' else FILE_EXTENSIONS[self.compression]
+        path = os.path.join(self.batch_dir, '{}-{}.{}'.format(stream_name, uuid.uuid4().hex, extension))
+        if self.batch_format == 'parquet':
+            return ParquetBatchFile(path, self.compression)
+        return JSONLBatchFile(path, self.compression)
+
+    def write_record(self, stream_name, data, record):
+        """
+        Write the serialized record to the open file of the stream.
+        Returns the BATCH messages of the finalized files if the file was rolled over.
+        """
+        if stream_name not in self.files:
+            self.files[stream_name] = self._open(stream_name)
+            self.file_bytes[stream_name] = 0
+
+        self.files[stream_name].write(data, record)
+        self.file_bytes[stream_name] += len(data)
+
+        if self.file_bytes[stream_name] >= self.max_bytes:
+            return self.finalize()
+        return []
+
+    def finalize(self):
+        """
+        Close all the open files and return a BATCH message for each of them.
+        """
+        messages = []
+        for stream_name, batch_file in self.files.items():
+            batch_file.close()
+            LOGGER.info('Finalized batch for stream %s: %s', stream_name, batch_file.path)
+            messages.append({
+                'type': 'BATCH',
+                'stream': stream_name,
+                'encoding': {'format': self.batch_format, 'compression': self.compression},
+                'manifest': ['file://' + batch_file.path],
+            })
+        self.files = {}
+        self.file_bytes = {}
+        return messages
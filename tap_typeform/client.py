@@ -1,3 +1,6 @@
+import threading
+import time
+
 import requests
 import backoff
 import singer
@@ -5,7 +8,8 @@ import singer
 from datetime import timedelta
 from singer.utils import now
 from requests.exceptions import ChunkedEncodingError, Timeout, ConnectionError
-from tap_typeform.utils import write_config
+from tap_typeform import http_metrics, phase_timers, run_report
+from tap_typeform.utils import config_lock, read_config, write_config
 
 
 LOGGER = singer.get_logger()
@@ -112,6 +116,24 @@ def raise_for_error(response):
         except (ValueError, TypeError):
             raise TypeformError(error) from None
 
+class RateLimiter:
+    """
+    Spaces the requests of all the threads sharing the client to at most `rate` per second.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.lock = threading.Lock()
+        self.next_time = 0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
 class Client(object):
     """
     The client class is used for making REST calls to the Github API.
@@ -126,6 +148,9 @@ class Client(object):
         self.form_page_size = FORMS_PAGE_SIZE
         self.config_path = config_path
         self.get_page_size(config)
+        self.rate_limiter = None
+        if config.get('max_requests_per_second') and float(config['max_requests_per_second']) > 0:
+            self.rate_limiter = RateLimiter(float(config['max_requests_per_second']))
 
         self.client_id = config.get('client_id')
         self.client_secret = config.get('client_secret')
@@ -160,6 +185,22 @@ class Client(object):
 
             return
 
+        # The token refresh and the config update are done under a lock, so processes sharing
+        # the config do not use a refresh token already exchanged by another one
+        with config_lock(self.config_path):
+            config = read_config(self.config_path)
+            if config.get('refresh_token') and config['refresh_token'] != self.refresh_token:
+                LOGGER.info('Using the tokens refreshed by another process')
+                self.refresh_token = config['refresh_token']
+                self.access_token = config.get('token')
+                return
+
+            self.exchange_refresh_token()
+
+    def exchange_refresh_token(self):
+        """
+        Exchange the refresh token for new tokens and save them to the config file.
+        """
         response = self.session.post(url=self.OAUTH_URL,
                                      headers={
                                          'Content-Type': 'application/x-www-form-urlencoded'},
@@ -202,9 +243,9 @@ class Client(object):
         return f"{self.BASE_URL}/{endpoint}"
 
     @backoff.on_exception(backoff.expo, (Timeout, ConnectionError),  # Backoff for Timeout and ConnectionError.
-                          max_tries=5, factor=2, jitter=None)
+                          max_tries=5, factor=2, jitter=None, on_backoff=[http_metrics.on_backoff, run_report.on_backoff])
     @backoff.on_exception(backoff.expo, (TypeformInternalError, TypeformNotAvailableError, TypeformTooManyError, ChunkedEncodingError),
-                          max_tries=3, factor=2)
+                          max_tries=3, factor=2, on_backoff=[http_metrics.on_backoff, run_report.on_backoff])
     def request(self, url, params={}, **kwargs):
         """
         Call rest API and return the response in case of status code 200.
@@ -215,11 +256,32 @@ class Client(object):
         if self.access_token:
             kwargs['headers']['Authorization'] = 'Bearer ' + self.access_token
 
-        LOGGER.info("URL: %s and Params: %s", url, params)
-        response = self.session.get(url, params=params, headers=kwargs['headers'], timeout=self.request_timeout)
-        if response.status_code != 200:
-            raise_for_error(response)
+        if self.rate_limiter:
+            self.rate_limiter.wait()
 
-        if 'total_items' in response.json():
-            LOGGER.info('raw data items= {}'.format(response.json()['total_items']))
-        return response.json()
+        LOGGER.info("URL: %s and Params: %s", url, params)
+        endpoint, form_id = http_metrics.get_endpoint(url)
+        with singer.metrics.http_request_timer(endpoint) as timer:
+            if form_id:
+                timer.tags['form_id'] = form_id
+            start = time.monotonic()
+            response = self.session.get(url, params=params, headers=kwargs['headers'], timeout=self.request_timeout)
+            seconds = time.monotonic() - start
+            timer.tags[singer.metrics.Tag.http_status_code] = response.status_code
+            run_report.add_current(api_calls=1, bytes=len(response.content))
+            if response.status_code != 200:
+                http_metrics.record_request(endpoint, form_id, response.status_code, seconds, len(response.content))
+                raise_for_error(response)
+
+            # Decode the response once, the timing tells the time spent in the tap from the API latency
+            decode_start = time.monotonic()
+            data = response.json()
+            decode_seconds = time.monotonic() - decode_start
+            http_metrics.record_request(endpoint, form_id, response.status_code, seconds, len(response.content),
+                                        decode_seconds)
+            phase_timers.add_current('fetch', seconds)
+            phase_timers.add_current('decode', decode_seconds)
+
+        if 'total_items' in data:
+            LOGGER.info('raw data items= {}'.format(data['total_items']))
+        return data
@@ -0,0 +1,131 @@
+import threading
+from collections import Counter, defaultdict
+
+import singer
+
+
+LOGGER = singer.get_logger()
+
+PERCENTILES = (50, 90, 99)
+
+
+def get_endpoint(url):
+    """
+    Return the endpoint of a request URL with the form id replaced by `{}`, and the form id.
+    """
+    path = url.split('//', 1)[1].split('/', 1)[-1] if '//' in url else url
+    parts = path.split('?', 1)[0].strip('/').split('/')
+    if len(parts) > 1 and parts[0] == 'forms':
+        return '/'.join(['forms', '{}'] + parts[2:]), parts[1]
+    return '/'.join(parts), None
+
+
+def percentile(sorted_values, percent):
+    """
+    Return the nearest-rank percentile of sorted values.
+    """
+    if not sorted_values:
+        return 0
+    rank = max(int(round(percent / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class RequestMetrics:
+    """
+    Collects the latency, size, status code and decode time of the API requests per endpoint,
+    and the backoff sleeps of the retried requests.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.status_codes = defaultdict(Counter)
+        self.response_bytes = Counter()
+        self.decode_seconds = Counter()
+        self.backoffs = Counter()
+        self.backoff_seconds = Counter()
+        self.forms = defaultdict(set)
+
+    def record_request(self, endpoint, form_id, status_code, seconds, size, decode_seconds=0):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            self.status_codes[endpoint][status_code] += 1
+            self.response_bytes[endpoint] += size
+            self.decode_seconds[endpoint] += decode_seconds
+            if form_id:
+                self.forms[endpoint].add(form_id)
+
+    def record_backoff(self, endpoint, seconds):
+        with self.lock:
+            self.backoffs[endpoint] += 1
+            self.backoff_seconds[endpoint] += seconds
+
+    def summary(self):
+        """
+        Return one summary dict per endpoint.
+        """
+        with self.lock:
+            summaries = []
+            for endpoint in sorted(set(self.latencies) | set(self.backoffs)):
+                latencies = self.latencies[endpoint]
+                sorted_latencies = sorted(latencies)
+                summaries.append({
+                    'endpoint': endpoint,
+                    'requests': len(latencies),
+                    'forms': len(self.forms[endpoint]),
+                    'seconds': sum(latencies),
+                    **{'p{}'.format(percent): percentile(sorted_latencies, percent) for percent in PERCENTILES},
+                    'max': sorted_latencies[-1] if sorted_latencies else 0,
+                    'bytes': self.response_bytes[endpoint],
+                    'decode_seconds': self.decode_seconds[endpoint],
+                    'status_codes': dict(self.status_codes[endpoint]),
+                    'rate_limited': self.status_codes[endpoint][429],
+                    'backoffs': self.backoffs[endpoint],
+                    'backoff_seconds': self.backoff_seconds[endpoint],
+                })
+            return summaries
+
+
+_metrics = RequestMetrics()
+
+
+def get_metrics():
+    return _metrics
+
+
+def reset():
+    global _metrics
+    _metrics = RequestMetrics()
+
+
+def record_request(endpoint, form_id, status_code, seconds, size, decode_seconds=0):
+    _metrics.record_request(endpoint, form_id, status_code, seconds, size, decode_seconds)
+
+
+def on_backoff(details):
+    """
+    `backoff` handler recording the sleep before retrying a request.
+    """
+    url = details['args'][1] if len(details['args']) > 1 else details['kwargs'].get('url', '')
+    endpoint, _ = get_endpoint(url)
+    _metrics.record_backoff(endpoint, details.get('wait') or 0)
+
+
+def log_summary(run_seconds=None):
+    """
+    Log the request metrics of the run per endpoint.
+    """
+    summaries = _metrics.summary()
+    for summary in summaries:
+        LOGGER.info('Requests to %s: %d requests for %d forms, latency p50 %.3fs, p90 %.3fs, p99 %.3fs, '
+                    'max %.3fs, %d bytes, decoding %.3fs, status codes %s, %d rate limited, '
+                    '%d backoffs sleeping %.1fs',
+                    summary['endpoint'], summary['requests'], summary['forms'], summary['p50'], summary['p90'],
+                    summary['p99'], summary['max'], summary['bytes'], summary['decode_seconds'],
+                    summary['status_codes'], summary['rate_limited'], summary['backoffs'],
+                    summary['backoff_seconds'])
+
+    if run_seconds:
+        request_seconds = sum(summary['seconds'] + summary['backoff_seconds'] for summary in summaries)
+        LOGGER.info('Requests and backoffs took %.1fs of the %.1fs run', request_seconds, run_seconds)
+    return summaries
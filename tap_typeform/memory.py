@@ -0,0 +1,179 @@
+import os
+import resource
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import singer
+
+
+LOGGER = singer.get_logger()
+
+TOP_SITES = 5
+TOP_FORMS = 10
+MB = 1024 * 1024
+
+
+def get_rss():
+    """
+    Return the resident memory of the process in bytes, or its peak where the current one
+    is not available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return get_peak_rss()
+
+
+def get_peak_rss():
+    # `ru_maxrss` is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def get_top_sites(limit):
+    """
+    Return the call sites holding the most memory traced by `tracemalloc`.
+    """
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    return [{'site': '{}:{}'.format(stat.traceback[0].filename, stat.traceback[0].lineno),
+             'bytes': stat.size, 'blocks': stat.count}
+            for stat in snapshot.statistics('lineno')[:limit]]
+
+
+class MemoryTracker:
+    """
+    Tracks the peak memory allocated by Python(with `tracemalloc`) and the resident memory of the
+    process, per stream and form. The peak is reset at the start of each form and page, so it
+    is process wide: with `stream_workers`, the streams synced concurrently share it.
+    """
+
+    def __init__(self, warning_mb=0, top_sites=TOP_SITES):
+        self.lock = threading.Lock()
+        self.warning_bytes = float(warning_mb or 0) * MB
+        self.top_sites = top_sites
+        self.peaks = {}
+        self.rss = {}
+        self.page_peaks = {}
+        self.warned = set()
+        self.largest = 0
+        self.largest_sites = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        tracemalloc.stop()
+
+    @contextmanager
+    def track(self, stream, form_id, page=False):
+        """
+        Track the memory of the block, a form or a page of a form.
+        """
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            self.record(stream, form_id, tracemalloc.get_traced_memory()[1], get_rss(), page)
+
+    def record(self, stream, form_id, peak, rss, page=False):
+        key = (stream, form_id)
+        with self.lock:
+            self.peaks[key] = max(self.peaks.get(key, 0), peak)
+            self.rss[key] = max(self.rss.get(key, 0), rss)
+            if page:
+                self.page_peaks[stream] = max(self.page_peaks.get(stream, 0), peak)
+
+            # Snapshot the call sites at the end of the largest form or page so far, while its records are held
+            take_sites = peak > self.largest
+            if take_sites:
+                self.largest = peak
+
+            warn = self.warning_bytes and rss >= self.warning_bytes and key not in self.warned
+            if warn:
+                self.warned.add(key)
+
+        if take_sites:
+            self.largest_sites = {'stream': stream, 'form_id': form_id, 'sites': get_top_sites(self.top_sites)}
+        if warn:
+            LOGGER.warning('Memory of stream %s - form: %s reached %.1f MB (peak allocated %.1f MB), '
+                           'above the %.1f MB warning threshold',
+                           stream, form_id, rss / MB, peak / MB, self.warning_bytes / MB)
+
+    def summary(self):
+        """
+        Return the peaks per stream and form, the largest page per stream and the call sites of
+        the largest allocation.
+        """
+        with self.lock:
+            forms = [{'stream': stream, 'form_id': form_id, 'peak_bytes': peak, 'rss_bytes': self.rss[key]}
+                     for key, peak in self.peaks.items() for stream, form_id in [key]]
+            forms.sort(key=lambda form: form['peak_bytes'], reverse=True)
+            streams = {}
+            for form in forms:
+                stream_summary = streams.setdefault(form['stream'], {'peak_bytes': 0, 'rss_bytes': 0})
+                stream_summary['peak_bytes'] = max(stream_summary['peak_bytes'], form['peak_bytes'])
+                stream_summary['rss_bytes'] = max(stream_summary['rss_bytes'], form['rss_bytes'])
+                stream_summary['page_peak_bytes'] = self.page_peaks.get(form['stream'], 0)
+            return {'streams': streams, 'forms': forms, 'peak_rss_bytes': get_peak_rss(),
+                    'largest_allocation': self.largest_sites}
+
+
+_tracker = None
+
+
+def configure(config):
+    """
+    Start tracking the memory if `memory_tracking` is set.
+    """
+    global _tracker
+    if _tracker:
+        _tracker.stop()
+    _tracker = None
+    if config.get('memory_tracking'):
+        _tracker = MemoryTracker(config.get('memory_warning_mb'), int(config.get('memory_top_sites') or TOP_SITES))
+        _tracker.start()
+
+
+def get_tracker():
+    return _tracker
+
+
+def track(stream, form_id, page=False):
+    if _tracker is None:
+        return nullcontext()
+    return _tracker.track(stream, form_id, page)
+
+
+def log_summary():
+    """
+    Log the peak memory per stream, of the forms using the most and the call sites of the
+    largest allocation, then stop tracking.
+    """
+    global _tracker
+    if _tracker is None:
+        return None
+
+    summary = _tracker.summary()
+    _tracker.stop()
+    _tracker = None
+    for stream, stream_summary in summary['streams'].items():
+        LOGGER.info('Memory of stream %s: peak allocated %.1f MB, largest page %.1f MB, resident %.1f MB',
+                    stream, stream_summary['peak_bytes'] / MB, stream_summary['page_peak_bytes'] / MB,
+                    stream_summary['rss_bytes'] / MB)
+    for form in summary['forms'][:TOP_FORMS]:
+        LOGGER.info('Memory of stream %s - form: %s: peak allocated %.1f MB, resident %.1f MB',
+                    form['stream'], form['form_id'], form['peak_bytes'] / MB, form['rss_bytes'] / MB)
+    if summary['largest_allocation']:
+        largest = summary['largest_allocation']
+        for site in largest['sites']:
+            LOGGER.info('Largest allocation, stream %s - form: %s: %.1f MB in %d blocks at %s',
+                        largest['stream'], largest['form_id'], site['bytes'] / MB, site['blocks'], site['site'])
+    LOGGER.info('Peak resident memory of the sync: %.1f MB', summary['peak_rss_bytes'] / MB)
+    return summary
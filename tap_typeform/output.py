@@ -0,0 +1,349 @@
+import atexit
+import io
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import pytz
+import singer
+from tap_typeform.batch import BatchWriter, BATCH_MAX_BYTES
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+LOGGER = singer.get_logger()
+
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+OUTPUT_FLUSH_INTERVAL = 5
+OUTPUT_QUEUE_SIZE = 16
+
+
+def format_message(message):
+    """
+    Serialize a message dict to a newline terminated JSON line.
+    Uses `orjson` when it is installed and falls back to singer's encoder for anything
+    orjson can not represent exactly(e.g. `Decimal` values coming out of the transformer).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(message) + b'\n'
+        except TypeError:
+            pass
+    return (singer.format_message(_DictMessage(message)) + '\n').encode('utf-8')
+
+
+class _DictMessage(singer.Message):
+    """
+    Wrap an already built message dict so it can be passed to `singer.format_message`.
+    """
+    def __init__(self, message):
+        self.message = message
+
+    def asdict(self):
+        return self.message
+
+
+class MessageWriter:
+    """
+    Buffers serialized singer messages and writes them to stdout in large chunks.
+    The buffer is flushed when it grows beyond `buffer_size` bytes, when `flush_interval`
+    seconds have passed since the last flush, on every STATE message and at exit.
+    """
+
+    def __init__(self, buffer_size=OUTPUT_BUFFER_SIZE, flush_interval=OUTPUT_FLUSH_INTERVAL, stream=None):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.stream = stream
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, data):
+        """
+        Add serialized message bytes to the buffer and flush if the buffer is due.
+        """
+        self.buffer.append(data)
+        self.buffered_bytes += len(data)
+        if self.buffered_bytes >= self.buffer_size or \
+                time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def write_message(self, message):
+        self.write(format_message(message))
+        if message['type'] == 'STATE':
+            self.flush()
+
+    def flush(self):
+        """
+        Write all the buffered messages to the output stream.
+        """
+        if self.buffer:
+            self._write_out(b''.join(self.buffer))
+            self.buffer = []
+            self.buffered_bytes = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+    def _write_out(self, data):
+        stream = self.stream
+        if stream is None:
+            # Anything written through the text layer(e.g. print) must go out first
+            sys.stdout.flush()
+            stream = getattr(sys.stdout, 'buffer', None)
+            if stream is None:
+                sys.stdout.write(data.decode('utf-8'))
+                sys.stdout.flush()
+                return
+        stream.write(data)
+        stream.flush()
+
+
+class ThreadedMessageWriter(MessageWriter):
+    """
+    Hands the buffered chunks to a dedicated writer thread through a bounded queue, so
+    fetching and transforming can continue while a slow target drains the pipe.
+    Chunks are written in the order they are queued, so a STATE message is only written
+    after all the records before it.
+    """
+
+    def __init__(self, buffer_size=OUTPUT_BUFFER_SIZE, flush_interval=OUTPUT_FLUSH_INTERVAL,
+                 queue_size=OUTPUT_QUEUE_SIZE, stream=None):
+        super().__init__(buffer_size, flush_interval, stream)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.max_queue_depth = 0
+        self.blocked_time = 0.0
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='output-writer', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            data = self.queue.get()
+            if data is None:
+                return
+            try:
+                if self.error is None:
+                    self._write_out(data)
+            except Exception as err: # pylint: disable=broad-except
+                # Keep draining the queue so the producer never blocks, the error is raised there
+                self.error = err
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def _put(self, data):
+        self._raise_error()
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            start = time.monotonic()
+            self.queue.put(data)
+            self.blocked_time += time.monotonic() - start
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def flush(self):
+        """
+        Queue all the buffered messages for the writer thread.
+        """
+        if self.buffer:
+            self._put(b''.join(self.buffer))
+            self.buffer = []
+            self.buffered_bytes = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        """
+        Flush the buffer, wait for the writer thread to drain the queue and report queue stats.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        self.queue.put(None)
+        self.thread.join()
+        LOGGER.info('Output writer max queue depth: %d, producer blocked for %.3f seconds',
+                    self.max_queue_depth, self.blocked_time)
+        self._raise_error()
+
+
+_writer = MessageWriter()
+_batch = None
+_pending_state = None
+_records_written = 0
+_time_extracted = (None, None)
+# Streams synced concurrently share the writer
+_lock = threading.RLock()
+
+
+def get_config_value(config, key, default):
+    """
+    Return the positive numeric value of `key` from the config, otherwise the default.
+    """
+    value = config.get(key)
+    if value and float(value) > 0:
+        return float(value)
+    return default
+
+
+def configure(config):
+    """
+    Replace the active writer with one built from the config.
+    """
+    global _writer, _batch
+    close()
+    buffer_size = int(get_config_value(config, 'output_buffer_size', OUTPUT_BUFFER_SIZE))
+    flush_interval = get_config_value(config, 'output_flush_interval', OUTPUT_FLUSH_INTERVAL)
+
+    if config.get('output_mode') == 'threaded':
+        _writer = ThreadedMessageWriter(
+            buffer_size=buffer_size,
+            flush_interval=flush_interval,
+            queue_size=int(get_config_value(config, 'output_queue_size', OUTPUT_QUEUE_SIZE)))
+    else:
+        _writer = MessageWriter(buffer_size=buffer_size, flush_interval=flush_interval)
+
+    if config.get('batch_mode'):
+        _batch = BatchWriter(
+            config.get('batch_dir') or 'batches',
+            batch_format=config.get('batch_format') or 'jsonl',
+            compression=config.get('batch_compression'),
+            max_bytes=int(get_config_value(config, 'batch_max_bytes', BATCH_MAX_BYTES)))
+    else:
+        _batch = None
+    return _writer
+
+
+def get_writer():
+    return _writer
+
+
+def accepts_chunks():
+    """
+    Return whether serialized RECORD messages can be written as they are.
+    """
+    return _batch is None
+
+
+def write_chunk(data, records=0):
+    """
+    Write already serialized messages holding `records` RECORD messages.
+    """
+    global _records_written
+    with _lock:
+        _records_written += records
+        if data:
+            _writer.write(data)
+
+
+def records_written():
+    """
+    Return the number of records written since the start of the process.
+    """
+    return _records_written
+
+
+@contextmanager
+def capture():
+    """
+    Collect the messages written inside the block in a buffer instead of writing them out.
+    """
+    global _writer, _batch
+    previous = (_writer, _batch)
+    buffer = io.BytesIO()
+    _writer = MessageWriter(buffer_size=float('inf'), flush_interval=float('inf'), stream=buffer)
+    _batch = None
+    try:
+        yield buffer
+    finally:
+        _writer.flush()
+        _writer, _batch = previous
+
+
+def _format_time_extracted(time_extracted):
+    """
+    Format `time_extracted` the same way as `singer.RecordMessage`, caching the last value
+    since all the records of a page share the same extraction time.
+    """
+    global _time_extracted
+    if _time_extracted[0] is not time_extracted:
+        _time_extracted = (time_extracted, singer.utils.strftime(time_extracted.astimezone(pytz.utc)))
+    return _time_extracted[1]
+
+
+def write_record(stream_name, record, time_extracted=None):
+    global _records_written
+    with _lock:
+        _records_written += 1
+        if _batch is not None and stream_name in _batch.streams:
+            batch_messages = _batch.write_record(stream_name, format_message(record), record)
+            if batch_messages:
+                _write_batches(batch_messages)
+            return
+
+        message = {'type': 'RECORD', 'stream': stream_name, 'record': record}
+        if time_extracted:
+            message['time_extracted'] = _format_time_extracted(time_extracted)
+        _writer.write_message(message)
+
+
+def write_schema(stream_name, schema, key_properties, bookmark_properties=None):
+    if isinstance(key_properties, (str, bytes)):
+        key_properties = [key_properties]
+    message = {'type': 'SCHEMA', 'stream': stream_name, 'schema': schema, 'key_properties': key_properties}
+    if bookmark_properties:
+        message['bookmark_properties'] = bookmark_properties
+    with _lock:
+        _writer.write_message(message)
+
+
+def write_state(value):
+    """
+    Write the state message. While batch files are open the state is held back and
+    written right after the BATCH messages of those files.
+    """
+    global _pending_state
+    message = format_message({'type': 'STATE', 'value': value})
+    with _lock:
+        if _batch is not None and _batch.has_open_batches():
+            _pending_state = message
+            return
+        _pending_state = None
+        _writer.write(message)
+        _writer.flush()
+
+
+def _write_batches(batch_messages):
+    global _pending_state
+    for message in batch_messages:
+        _writer.write_message(message)
+    if _pending_state is not None:
+        _writer.write(_pending_state)
+        _pending_state = None
+    _writer.flush()
+
+
+def flush():
+    with _lock:
+        _writer.flush()
+
+
+def close():
+    """
+    Finalize the open batches, write the held back state and close the writer.
+    """
+    with _lock:
+        if _batch is not None:
+            _write_batches(_batch.finalize())
+        _writer.close()
+
+
+atexit.register(close)
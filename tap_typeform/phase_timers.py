@@ -0,0 +1,153 @@
+import json
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+import singer
+
+
+LOGGER = singer.get_logger()
+
+METRIC = 'sync_phase_duration'
+PHASES = ('fetch', 'decode', 'flatten', 'transform', 'emit')
+
+# The streams are timed in bulk(a page or a form at a time), so the timers are cheap enough to
+# leave on: two `perf_counter` calls per record and phase, and one locked update per page.
+clock = perf_counter
+
+
+class PhaseTimers:
+    """
+    Accumulates the seconds spent in each phase of the sync per stream and form.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seconds = defaultdict(float)
+
+    def add(self, stream, form_id, phase, seconds):
+        with self.lock:
+            self.seconds[(stream, form_id, phase)] += seconds
+
+    def add_phases(self, stream, form_id, phases):
+        with self.lock:
+            for phase, seconds in phases.items():
+                self.seconds[(stream, form_id, phase)] += seconds
+
+    def merge(self, seconds):
+        with self.lock:
+            for key, value in seconds.items():
+                self.seconds[tuple(key)] += value
+
+    def pop(self):
+        """
+        Return the seconds accumulated so far and start again from zero.
+        """
+        with self.lock:
+            seconds, self.seconds = dict(self.seconds), defaultdict(float)
+            return seconds
+
+    def summary(self):
+        """
+        Return the seconds of each phase per stream, in total and per form.
+        """
+        with self.lock:
+            summary = {}
+            for (stream, form_id, phase), seconds in sorted(self.seconds.items(), key=lambda item: str(item[0])):
+                stream_summary = summary.setdefault(stream, {'phases': {}, 'forms': {}})
+                stream_summary['phases'][phase] = stream_summary['phases'].get(phase, 0) + seconds
+                if form_id:
+                    stream_summary['forms'].setdefault(form_id, {})[phase] = seconds
+            return summary
+
+
+_timers = PhaseTimers()
+_context = threading.local()
+
+
+def get_timers():
+    return _timers
+
+
+def reset():
+    global _timers
+    _timers = PhaseTimers()
+
+
+def add(stream, form_id, phase, seconds):
+    _timers.add(stream, form_id, phase, seconds)
+
+
+def add_phases(stream, form_id, phases):
+    _timers.add_phases(stream, form_id, phases)
+
+
+@contextmanager
+def context(stream, form_id):
+    """
+    Attribute the requests made by this thread to the stream and form.
+    """
+    previous = getattr(_context, 'current', None)
+    _context.current = (stream, form_id)
+    try:
+        yield
+    finally:
+        _context.current = previous
+
+
+def get_context():
+    """
+    Return the stream and form of the current thread's context, or None.
+    """
+    return getattr(_context, 'current', None)
+
+
+def bind_context(function):
+    """
+    Return a function calling `function` in the context of the current thread, so the work
+    submitted to an executor is attributed to the stream and form of the submitting thread.
+    """
+    current = get_context()
+
+    def call(*args, **kwargs):
+        previous = getattr(_context, 'current', None)
+        _context.current = current
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _context.current = previous
+    return call
+
+
+def add_current(phase, seconds):
+    """
+    Add the seconds to the stream and form of the current thread's context, if any.
+    """
+    current = getattr(_context, 'current', None)
+    if current:
+        _timers.add(current[0], current[1], phase, seconds)
+
+
+def log_summary(per_form=False):
+    """
+    Emit the phase timings of each stream as metric messages, followed by a JSON summary of
+    the run. With `per_form` the timings of each form are emitted and logged as well, a few
+    lines per form, so they are otherwise only written to the run report.
+    """
+    summary = _timers.summary()
+    for stream, stream_summary in summary.items():
+        for phase, seconds in stream_summary['phases'].items():
+            singer.metrics.log(LOGGER, singer.metrics.Point(
+                'timer', METRIC, seconds, {'stream': stream, 'phase': phase}))
+        if per_form:
+            for form_id, phases in stream_summary['forms'].items():
+                for phase, seconds in phases.items():
+                    singer.metrics.log(LOGGER, singer.metrics.Point(
+                        'timer', METRIC, seconds, {'stream': stream, 'form_id': form_id, 'phase': phase}))
+
+    if summary:
+        logged = summary if per_form else {stream: {'phases': stream_summary['phases']}
+                                           for stream, stream_summary in summary.items()}
+        LOGGER.info('Phase timings: %s', json.dumps(logged, sort_keys=True))
+    return summary
@@ -0,0 +1,139 @@
+import signal
+from collections import defaultdict, deque
+from concurrent import futures
+
+import singer
+from tap_typeform import output, phase_timers, run_report
+
+
+LOGGER = singer.get_logger()
+
+_pool = None
+_max_in_flight = 0
+
+
+def ignore_sigint():
+    """
+    The workers share the process group of the tap, SIGINT is handled by the tap only.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def start(config):
+    """
+    Start the pool of transform workers if `transform_workers` is more than 1.
+    """
+    global _pool, _max_in_flight
+    workers = int(config.get('transform_workers') or 0)
+    if workers > 1:
+        # Imported only when the workers are used
+        import multiprocessing
+
+        LOGGER.info('Starting %d transform workers', workers)
+        # The workers are started on the first page, possibly by the thread of a concurrent stream while
+        # other threads hold the locks of the output, timers and report. Forked workers would inherit
+        # them held, so they are started from a clean process instead.
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        _pool = futures.ProcessPoolExecutor(max_workers=workers, initializer=ignore_sigint,
+                                            mp_context=multiprocessing.get_context(start_method))
+        _max_in_flight = 2 * workers
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+def enabled():
+    """
+    Return whether pages can be handed to the transform workers.
+    Batch mode writes records to files in this process, so it always transforms in process.
+    """
+    return _pool is not None and output.accepts_chunks()
+
+
+def transform_page(stream_class, config, records, catalogs, selected_stream_ids,
+                   form_id, max_bookmark, state, start_date):
+    """
+    Flatten, transform and serialize a page of records in a worker process.
+    Returns the serialized messages, the max bookmark, the record counts, the boundary
+    indexes, the phase timings and the report counts of the page.
+    """
+    # Drop the timings and counts left by the previous page of the worker, the page's own are returned
+    phase_timers.get_timers().pop()
+    run_report.get_report().pop()
+    stream_obj = stream_class(config)
+    stream_obj.records_count = defaultdict(int)
+    with output.capture() as buffer:
+        max_bookmark = stream_obj.write_records(records, catalogs, selected_stream_ids,
+                                                form_id, max_bookmark, state, start_date)
+    return buffer.getvalue(), max_bookmark, dict(stream_obj.records_count), stream_obj.boundaries, \
+        phase_timers.get_timers().pop(), run_report.get_report().pop()
+
+
+def get_form_state(state, form_id):
+    """
+    Return the part of the state the workers need to filter the records of a form.
+    """
+    return {'bookmarks': {
+        stream: {form_id: form_bookmarks[form_id]}
+        for stream, form_bookmarks in state.get('bookmarks', {}).items()
+        if isinstance(form_bookmarks, dict) and form_id in form_bookmarks
+    }}
+
+
+class PagePipeline:
+    """
+    Hands the pages of a form to the transform workers and writes the serialized chunks
+    in the same order as the pages were fetched.
+    """
+
+    def __init__(self, stream, catalogs, selected_stream_ids, form_id, state, start_date, max_bookmark):
+        self.stream = stream
+        self.catalogs = catalogs
+        self.selected_stream_ids = selected_stream_ids
+        self.form_id = form_id
+        self.state = get_form_state(state, form_id)
+        self.start_date = start_date
+        self.initial_bookmark = max_bookmark
+        self.max_bookmark = max_bookmark
+        self.futures = deque()
+
+    def submit(self, records):
+        """
+        Submit a page to the workers, waiting for the oldest page when too many are in flight.
+        """
+        self.futures.append(_pool.submit(
+            transform_page, type(self.stream), self.stream.config, records, self.catalogs,
+            self.selected_stream_ids, self.form_id, self.initial_bookmark, self.state, self.start_date))
+
+        while len(self.futures) > _max_in_flight:
+            self._write_next()
+
+    def _write_next(self):
+        data, max_bookmark, records_count, boundaries, phases, report_counts = self.futures.popleft().result()
+        start = phase_timers.clock()
+        output.write_chunk(data, sum(records_count.values()))
+        phase_timers.add(self.stream.tap_stream_id, self.form_id, 'emit', phase_timers.clock() - start)
+        # The worker timed the flatten, transform and serialization of the page
+        phase_timers.get_timers().merge(phases)
+        run_report.get_report().merge(report_counts)
+        self.max_bookmark = max(self.max_bookmark, max_bookmark)
+        for stream_name, count in records_count.items():
+            self.stream.records_count[stream_name] += count
+        for stream_name, boundary in boundaries.items():
+            if stream_name in self.stream.boundaries:
+                self.stream.boundaries[stream_name].merge(boundary)
+            else:
+                self.stream.boundaries[stream_name] = boundary
+
+    def drain(self):
+        """
+        Write the remaining pages and return the max bookmark of all the pages.
+        """
+        while self.futures:
+            self._write_next()
+        return self.max_bookmark
@@ -0,0 +1,110 @@
+import json
+import math
+import sys
+import time
+from datetime import datetime
+
+import singer
+from tap_typeform import preflight, shard
+from tap_typeform.streams import STREAMS, get_min_bookmark
+from tap_typeform.sync import get_selected_streams, get_stream_to_sync
+
+
+LOGGER = singer.get_logger()
+
+
+def count_responses(client, stream_name, form_id, state, selected_streams, start_date):
+    """
+    Return the responses of the form the stream would fetch from its bookmarks, their minimum
+    bookmark and the seconds the count request took, with a single response requested.
+    """
+    stream_obj = STREAMS[stream_name]
+    current_time = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+    since = get_min_bookmark(stream_name, selected_streams, current_time, start_date, state, form_id,
+                             stream_obj.replication_keys[0])
+    started = time.monotonic()
+    response = client.request(client.build_url(stream_obj.endpoint).format(form_id),
+                              preflight.get_count_params(stream_name, since))
+    return response.get('total_items', 0), since, time.monotonic() - started
+
+
+def get_request_seconds(config, latency):
+    """
+    Return the expected seconds per request, from the latency of the count requests and the rate limit.
+    """
+    rate = float(config.get('max_requests_per_second') or 0)
+    return max(latency, 1 / rate if rate > 0 else 0)
+
+
+def plan(client, config, state, catalog, forms_to_sync):
+    """
+    Estimate the requests, records and duration of the sync of each stream and form, from the
+    current state and `start_date`, without syncing them. The responses of each form are
+    counted with a request of a single response per responses stream.
+    """
+    selected_streams = get_selected_streams(catalog)
+    streams_to_sync = get_stream_to_sync(selected_streams)
+    forms_to_sync = list(forms_to_sync)
+    if config.get('shard'):
+        state = shard.flatten_state(state)
+        forms_to_sync = shard.get_shard_forms(config, state, forms_to_sync)
+        if shard.parse_shard(config['shard'])[0] != 0:
+            streams_to_sync = [stream for stream in streams_to_sync if stream != 'forms']
+
+    form_plans = []
+    latencies = []
+    for stream_name in preflight.get_responses_streams(streams_to_sync):
+        for form_id in forms_to_sync:
+            records, since, seconds = count_responses(client, stream_name, form_id, state, selected_streams,
+                                                      config['start_date'])
+            latencies.append(seconds)
+            form_plans.append({'stream': stream_name, 'form_id': form_id, 'since': since, 'records': records,
+                               'requests': max(math.ceil(records / client.page_size), 1)})
+
+    # The other streams request each form once, and the forms stream each page of forms. Child streams
+    # are synced from the responses of their parent.
+    for stream_name in streams_to_sync:
+        if stream_name == 'forms':
+            form_plans.append({'stream': stream_name, 'form_id': None, 'since': None, 'records': None,
+                               'requests': max(math.ceil(len(forms_to_sync) / client.form_page_size), 1)})
+        elif not STREAMS[stream_name].parent and STREAMS[stream_name].endpoint != preflight.RESPONSES_ENDPOINT:
+            form_plans.extend({'stream': stream_name, 'form_id': form_id, 'since': None, 'records': None,
+                               'requests': 1} for form_id in forms_to_sync)
+
+    request_seconds = get_request_seconds(config, sum(latencies) / len(latencies) if latencies else 0)
+    streams = {}
+    for form_plan in form_plans:
+        form_plan['seconds'] = round(form_plan['requests'] * request_seconds, 3)
+        stream_plan = streams.setdefault(form_plan['stream'], {'forms': 0, 'requests': 0, 'records': 0, 'seconds': 0})
+        stream_plan['forms'] += 1
+        stream_plan['requests'] += form_plan['requests']
+        stream_plan['records'] += form_plan['records'] or 0
+        stream_plan['seconds'] = round(stream_plan['seconds'] + form_plan['seconds'], 3)
+
+    # With `stream_workers` the streams of the forms are synced concurrently
+    seconds = sum(stream_plan['seconds'] for stream_plan in streams.values())
+    stream_workers = int(config.get('stream_workers') or 0)
+    if stream_workers > 1 and streams:
+        seconds = max(seconds / stream_workers, max(stream_plan['seconds'] for stream_plan in streams.values()))
+    return {
+        'forms': len(forms_to_sync),
+        'streams': streams,
+        'requests': sum(stream_plan['requests'] for stream_plan in streams.values()),
+        'records': sum(stream_plan['records'] for stream_plan in streams.values()),
+        'seconds': round(seconds, 3),
+        'count_requests': len(latencies),
+        'request_seconds': round(request_seconds, 3),
+        'form_plans': form_plans,
+    }
+
+
+def print_plan(client, config, state, catalog, forms_to_sync):
+    """
+    Write the plan of the sync to stdout, in place of the sync.
+    """
+    sync_plan = plan(client, config, state, catalog, forms_to_sync)
+    LOGGER.info('Planned %d requests for %d records of %d forms, taking about %.0f seconds',
+                sync_plan['requests'], sync_plan['records'], sync_plan['forms'], sync_plan['seconds'])
+    json.dump(sync_plan, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return sync_plan
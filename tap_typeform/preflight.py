@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pendulum
+import singer
+from tap_typeform.streams import STREAMS, get_bookmark, get_min_bookmark
+
+
+LOGGER = singer.get_logger()
+
+RESPONSES_ENDPOINT = 'forms/{}/responses'
+
+
+def get_responses_streams(streams_to_sync):
+    """
+    Return the streams to sync that are fetched from the responses endpoint.
+    """
+    return [stream for stream in streams_to_sync if STREAMS[stream].endpoint == RESPONSES_ENDPOINT]
+
+
+def get_since(state, form_id, selected_streams, responses_streams, start_date):
+    """
+    Return the minimum bookmark of the responses streams of the form and the landing ids
+    already emitted at that bookmark.
+    """
+    current_time = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+    since = min(get_min_bookmark(stream, selected_streams, current_time, start_date, state, form_id,
+                                 STREAMS[stream].replication_keys[0])
+                for stream in responses_streams)
+
+    landing_ids = set()
+    for stream in responses_streams:
+        for stream_name in [stream] + STREAMS[stream].children:
+            bookmark_key = STREAMS[stream_name].replication_keys[0]
+            if stream_name in selected_streams and get_bookmark(state, stream_name, form_id, bookmark_key, start_date) == since:
+                landing_ids.update(singer.bookmarks.get_bookmark(state, stream_name, form_id, {}).get('landing_ids', []))
+    return since, landing_ids
+
+
+def get_count_params(stream_name, since):
+    """
+    Return the params of a request of a single response of the stream since the bookmark, the
+    `total_items` of the response counts the responses the stream would fetch.
+    """
+    params = {'page_size': 1, 'since': int(pendulum.parse(since).timestamp())}
+    # `since` applies to the `submitted_at` of submitted responses and the `landed_at` of the others
+    if 'completed' in STREAMS[stream_name].params:
+        params['completed'] = STREAMS[stream_name].params['completed']
+    return params
+
+
+def is_idle(client, state, form_id, selected_streams, responses_streams, start_date):
+    """
+    Return whether the form has no responses newer than its bookmarks.
+    Each responses stream is probed with its own `completed` filter since its own bookmarks, by
+    a request of a single response, until one has new responses. The responses already emitted
+    at the bookmark are counted by the API as well.
+    """
+    full_url = client.build_url(RESPONSES_ENDPOINT).format(form_id)
+    for stream in responses_streams:
+        since, landing_ids = get_since(state, form_id, selected_streams, [stream], start_date)
+        response = client.request(full_url, get_count_params(stream, since))
+        if response.get('total_items', 0) > len(landing_ids):
+            return False
+    return True
+
+
+def get_idle_forms(client, state, forms_to_sync, selected_streams, streams_to_sync, start_date):
+    """
+    Return the forms without any new responses for the responses streams to sync.
+    """
+    responses_streams = get_responses_streams(streams_to_sync)
+    if not responses_streams:
+        return set()
+
+    idle_forms = {form_id for form_id in forms_to_sync
+                  if is_idle(client, state, form_id, selected_streams, responses_streams, start_date)}
+
+    LOGGER.info('Preflight found %d idle forms out of %d, skipping %d responses requests with at most %d preflight '
+                'requests', len(idle_forms), len(forms_to_sync), len(idle_forms) * len(responses_streams),
+                len(forms_to_sync) * len(responses_streams))
+    return idle_forms
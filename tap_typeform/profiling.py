@@ -0,0 +1,144 @@
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+import singer
+
+
+LOGGER = singer.get_logger()
+
+PROFILE_DIR = 'profiles'
+SAMPLING_INTERVAL = 0.005
+
+
+def pop_profile_arg(argv):
+    """
+    Remove the `--profile [streams]` argument from the command line arguments and return its
+    value, `True` to profile all the streams.
+    """
+    for position, arg in enumerate(argv):
+        if arg == '--profile':
+            if position + 1 < len(argv) and not argv[position + 1].startswith('-'):
+                value = argv[position + 1]
+                del argv[position:position + 2]
+                return value
+            del argv[position]
+            return True
+        if arg.startswith('--profile='):
+            del argv[position]
+            return arg.split('=', 1)[1]
+    return None
+
+
+def get_profiled(config):
+    """
+    Return the names profiled by the `profile` config, `True` for all of them.
+    """
+    profile = config.get('profile')
+    if profile is True or str(profile).lower() in ('true', 'all'):
+        return True
+    if not profile or str(profile).lower() == 'false':
+        return set()
+    if isinstance(profile, str):
+        profile = profile.split(',')
+    return {name.strip() for name in profile}
+
+
+def is_profiled(config, name):
+    """
+    Return whether `name`(a stream, `backfill` or `run`) is profiled. Profiling the whole `run`
+    gives one profile, instead of one per stream.
+    """
+    profiled = get_profiled(config)
+    if profiled is True:
+        return name != 'run'
+    if 'run' in profiled:
+        return name == 'run'
+    return name in profiled
+
+
+def get_profile_path(config, name, extension):
+    profile_dir = config.get('profile_dir') or PROFILE_DIR
+    os.makedirs(profile_dir, exist_ok=True)
+    # The shards of a sync may share the profile directory
+    if config.get('shard'):
+        name = '{}.shard{}'.format(name, str(config['shard']).split('/')[0])
+    return os.path.join(profile_dir, '{}.{}'.format(name, extension))
+
+
+def get_stack(frame):
+    """
+    Return the stack of a frame, outermost call first, in the collapsed stack format.
+    """
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append('{}:{}:{}'.format(os.path.basename(code.co_filename), code.co_name, code.co_firstlineno))
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+class Sampler:
+    """
+    Samples the stack of a thread every `interval` seconds. The samples are written in the
+    collapsed stack format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLING_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is not None:
+            self.samples[get_stack(frame)] += 1
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def enable(self):
+        self.thread = threading.Thread(target=self.run, name='profile-sampler', daemon=True)
+        self.thread.start()
+
+    def disable(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def dump_stats(self, path):
+        with open(path, 'w') as profile_file:
+            for stack, count in self.samples.most_common():
+                profile_file.write('{} {}\n'.format(stack, count))
+
+
+@contextmanager
+def profile(config, name):
+    """
+    Profile the calling thread within the block if profiling is on for `name`. With the
+    `deterministic` mode(the default) the stats are written by `cProfile` to `<name>.prof`,
+    with the `sampling` mode the sampled stacks are written to `<name>.folded`.
+    """
+    if not is_profiled(config, name):
+        yield
+        return
+
+    if config.get('profile_mode') == 'sampling':
+        interval = float(config.get('profile_interval') or SAMPLING_INTERVAL)
+        profiler, extension = Sampler(threading.get_ident(), interval), 'folded'
+    else:
+        profiler, extension = cProfile.Profile(), 'prof'
+
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = get_profile_path(config, name, extension)
+        profiler.dump_stats(path)
+        LOGGER.info('Wrote the profile of %s to %s', name, path)
@@ -0,0 +1,145 @@
+import threading
+import time
+
+import singer
+
+
+LOGGER = singer.get_logger()
+
+PROGRESS_INTERVAL = 60
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return 'unknown'
+    seconds = int(seconds)
+    return '{}:{:02d}:{:02d}'.format(seconds // 3600, seconds % 3600 // 60, seconds % 60)
+
+
+def get_eta(done, total, seconds):
+    """
+    Return the seconds left to reach `total` at the rate `done` were synced in `seconds`.
+    """
+    if done >= total:
+        return 0
+    if not done or not seconds:
+        return None
+    return (total - done) / (done / seconds)
+
+
+class FormProgress:
+
+    def __init__(self, total, now):
+        self.total = total
+        self.done = 0
+        self.started = now
+
+
+class ProgressReporter:
+    """
+    Tracks the responses synced per stream and form against the `total_items` of their first
+    page, and logs the progress of the forms in flight and of the run every `interval` seconds.
+    The forms queued and not started yet are estimated to have the average responses of the
+    forms started so far.
+    """
+
+    def __init__(self, interval=PROGRESS_INTERVAL, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.started = clock()
+        self.last_log = self.started
+        self.forms = {}
+        self.finished = set()
+        self.queued = 0
+
+    def queue(self, count):
+        """
+        Add `count` forms to sync, counted once per responses stream.
+        """
+        with self.lock:
+            self.queued += count
+
+    def add_page(self, stream, form_id, records, total_items):
+        """
+        Add a page of responses, the `total_items` of the first page of the form in this run
+        gives the responses it has to sync.
+        """
+        with self.lock:
+            now = self.clock()
+            progress = self.forms.get((stream, form_id))
+            # A form finished by the incremental sync can be synced again by the backfill lane
+            if progress is None or (stream, form_id) in self.finished:
+                self.finished.discard((stream, form_id))
+                progress = self.forms[(stream, form_id)] = FormProgress(max(total_items or 0, records), now)
+            progress.done += records
+            progress.total = max(progress.total, progress.done)
+            log = now - self.last_log >= self.interval
+            if log:
+                self.last_log = now
+        if log:
+            self.log_progress(now)
+
+    def finish_form(self, stream, form_id):
+        with self.lock:
+            progress = self.forms.get((stream, form_id))
+            if progress:
+                # Responses submitted during the sync can make the actual count differ from the total
+                progress.total = progress.done
+                self.finished.add((stream, form_id))
+
+    def log_progress(self, now=None):
+        now = self.clock() if now is None else now
+        with self.lock:
+            forms = [(key, progress.done, progress.total, progress.started) for key, progress in self.forms.items()]
+            finished = set(self.finished)
+            queued = max(self.queued, len(forms))
+
+        for (stream, form_id), done, total, started in forms:
+            if (stream, form_id) not in finished:
+                seconds = now - started
+                LOGGER.info('Progress of stream %s - form: %s: %d of %d responses (%.0f%%), %.1f responses/s, '
+                            '%s left', stream, form_id, done, total, 100 * done / total if total else 100,
+                            done / seconds if seconds else 0, format_seconds(get_eta(done, total, seconds)))
+
+        done = sum(form[1] for form in forms)
+        total = sum(form[2] for form in forms)
+        if forms:
+            total += round((queued - len(forms)) * total / len(forms))
+        seconds = now - self.started
+        LOGGER.info('Progress of the sync: %d of about %d responses (%.0f%%), %d of %d forms started, %d finished, '
+                    '%.1f responses/s, %s left, %s elapsed', done, total, 100 * done / total if total else 100,
+                    len(forms), queued, len(finished), done / seconds if seconds else 0,
+                    format_seconds(get_eta(done, total, seconds)), format_seconds(seconds))
+
+
+_reporter = None
+
+
+def configure(config):
+    """
+    Start reporting the progress every `progress_interval_seconds`(default 60), 0 turns it off.
+    """
+    global _reporter
+    interval = config.get('progress_interval_seconds')
+    interval = float(PROGRESS_INTERVAL if interval is None or interval == '' else interval)
+    _reporter = ProgressReporter(interval) if interval > 0 else None
+
+
+def get_reporter():
+    return _reporter
+
+
+def queue(count):
+    if _reporter:
+        _reporter.queue(count)
+
+
+def add_page(stream, form_id, records, total_items):
+    if _reporter:
+        _reporter.add_page(stream, form_id, records, total_items)
+
+
+def finish_form(stream, form_id):
+    if _reporter:
+        _reporter.finish_form(stream, form_id)
@@ -0,0 +1,77 @@
+import signal
+import sys
+import threading
+import time
+
+import singer
+
+
+LOGGER = singer.get_logger()
+
+_deadline = None
+_stop_reason = None
+_signalled = False
+_previous_handlers = {}
+
+
+def configure(config):
+    """
+    Start the run clock, the sync stops once `max_run_seconds` seconds passed.
+    """
+    global _deadline, _stop_reason, _signalled
+    max_run_seconds = float(config.get('max_run_seconds') or 0)
+    _deadline = time.monotonic() + max_run_seconds if max_run_seconds else None
+    _stop_reason = None
+    _signalled = False
+
+
+def request_stop(reason):
+    global _stop_reason
+    if _stop_reason is None:
+        LOGGER.warning('Stopping the sync: %s. The current pages are checkpointed and the next run continues from them',
+                       reason)
+        _stop_reason = reason
+
+
+def should_stop():
+    """
+    Return whether the sync should stop starting new pages.
+    """
+    if _stop_reason is None and _deadline is not None and time.monotonic() >= _deadline:
+        request_stop('max_run_seconds reached')
+    return _stop_reason is not None
+
+
+def get_stop_reason():
+    return _stop_reason
+
+
+def handle_signal(signum, frame):
+    """
+    Stop the sync gracefully on the first SIGTERM or SIGINT, and exit on the second one.
+    """
+    global _signalled
+    if _signalled:
+        # Exits the same way as on SIGINT, so the pending state is flushed at exit
+        LOGGER.warning('Received signal %d, flushing the state and exiting', signum)
+        sys.exit(128 + signum)
+    _signalled = True
+    request_stop('received signal {}'.format(signum))
+
+
+def install_signal_handlers():
+    """
+    Handle SIGTERM and SIGINT for the duration of the sync, until `restore_signal_handlers`.
+    """
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            _previous_handlers[signum] = signal.signal(signum, handle_signal)
+
+
+def restore_signal_handlers():
+    """
+    Restore the handlers of the signals installed before the sync.
+    """
+    while _previous_handlers:
+        signum, handler = _previous_handlers.popitem()
+        signal.signal(signum, handler)
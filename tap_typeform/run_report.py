@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import singer
+from singer import utils
+from tap_typeform import phase_timers
+
+
+LOGGER = singer.get_logger()
+
+COUNTERS = ('api_calls', 'pages', 'bytes', 'records_emitted', 'records_filtered', 'retries', 'duration_seconds')
+
+
+def get_form_bookmark(state, stream, form_id):
+    """
+    Return the bookmark value of the stream for the form, or of the stream if `form_id` is None.
+    """
+    bookmark = state.get('bookmarks', {}).get(stream, {})
+    if form_id:
+        bookmark = bookmark.get(form_id, {})
+    values = [value for key, value in bookmark.items() if key != 'landing_ids' and not isinstance(value, dict)]
+    return values[0] if len(values) == 1 else None
+
+
+class RunReport:
+    """
+    Collects the counters of the sync per stream and form, and the forms skipped or failed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(Counter)
+        self.skipped = []
+        self.failed = []
+
+    def add(self, stream, form_id, **counts):
+        with self.lock:
+            self.counters[(stream, form_id)].update(counts)
+
+    def merge(self, counters):
+        with self.lock:
+            for key, counts in counters.items():
+                self.counters[tuple(key)].update(counts)
+
+    def pop(self):
+        """
+        Return the counters collected so far and start again from zero.
+        """
+        with self.lock:
+            counters, self.counters = dict(self.counters), defaultdict(Counter)
+            return counters
+
+    def skip(self, stream, form_id, reason):
+        with self.lock:
+            self.skipped.append({'stream': stream, 'form_id': form_id, 'reason': reason})
+
+    def fail(self, stream, form_id, error):
+        with self.lock:
+            self.failed.append({'stream': stream, 'form_id': form_id,
+                                'error': '{}: {}'.format(type(error).__name__, error)})
+
+    def build(self, state_before, state_after, phases=None):
+        """
+        Return the report of the counters per stream and form, with the bookmarks of each form
+        before and after the sync, and the `phases` summary of the phase timers.
+        """
+        phases = phases or {}
+        with self.lock:
+            streams = {}
+            for (stream, form_id), counts in sorted(self.counters.items(), key=lambda item: str(item[0])):
+                stream_report = streams.setdefault(stream, {**{name: 0 for name in COUNTERS}, 'forms': {}})
+                for name in COUNTERS:
+                    stream_report[name] += counts[name]
+                form_report = {name: counts[name] for name in COUNTERS}
+                form_report['bookmark_before'] = get_form_bookmark(state_before, stream, form_id)
+                form_report['bookmark_after'] = get_form_bookmark(state_after, stream, form_id)
+                form_report['phases'] = phases.get(stream, {}).get('forms', {}).get(form_id, {})
+                stream_report['forms'][form_id or ''] = form_report
+            for stream, stream_report in streams.items():
+                stream_report['phases'] = phases.get(stream, {}).get('phases', {})
+            return {'streams': streams, 'skipped_forms': list(self.skipped), 'failed_forms': list(self.failed)}
+
+
+_report = RunReport()
+
+
+def get_report():
+    return _report
+
+
+def reset():
+    global _report
+    _report = RunReport()
+
+
+def add(stream, form_id, **counts):
+    _report.add(stream, form_id, **counts)
+
+
+def add_current(**counts):
+    """
+    Add the counts to the stream and form the current thread is syncing, if any.
+    """
+    current = phase_timers.get_context()
+    if current:
+        _report.add(current[0], current[1], **counts)
+
+
+def on_backoff(details):
+    """
+    `backoff` handler counting the retried requests.
+    """
+    add_current(retries=1)
+
+
+def skip(stream, form_id, reason):
+    _report.skip(stream, form_id, reason)
+
+
+@contextmanager
+def track(stream, form_id):
+    """
+    Time the sync of the form within the block, and report the form as failed if it raises.
+    """
+    start = time.monotonic()
+    try:
+        yield
+    except Exception as error:
+        _report.fail(stream, form_id, error)
+        raise
+    finally:
+        _report.add(stream, form_id, duration_seconds=time.monotonic() - start)
+
+
+def write(path, state_before, state_after, started, status, records_count):
+    """
+    Write the JSON report of the sync to `path`.
+    """
+    report = {
+        'started': utils.strftime(started),
+        'finished': utils.strftime(utils.now()),
+        'status': status,
+        'records_count': {stream: count for stream, count in records_count.items() if count},
+        **_report.build(state_before, state_after, phase_timers.get_timers().summary()),
+    }
+
+    # Written atomically, so a reader never gets a partial report
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as report_file:
+        json.dump(report, report_file, indent=2, default=str)
+    os.replace(report_file.name, path)
+    LOGGER.info('Wrote the run report to %s', path)
+    return report
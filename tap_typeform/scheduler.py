@@ -0,0 +1,104 @@
+import heapq
+
+import singer
+from singer import utils
+from tap_typeform import run_control, run_report, state_store
+
+
+LOGGER = singer.get_logger()
+
+ACTIVITY_KEY = 'form_activity'
+MAX_STALENESS_HOURS = 24
+RATE_SMOOTHING = 0.5
+
+
+def get_activity(state, form_id):
+    return state.get(ACTIVITY_KEY, {}).get(form_id)
+
+
+def hours_between(start, end):
+    return (end - start).total_seconds() / 3600
+
+
+def is_due(activity, now, max_staleness_hours):
+    """
+    Return whether the responses of a form should be synced by this run.
+    A form is due once the expected time to its next response(the inverse of its response
+    rate) or the max staleness passed since it was last synced. Forms without a rate yet are due.
+    """
+    if not activity or 'rate' not in activity:
+        return True
+    hours = hours_between(utils.strptime_to_utc(activity['last_synced']), now)
+    if hours >= max_staleness_hours:
+        return True
+    rate = activity['rate']
+    return rate > 0 and hours >= 1 / rate
+
+
+def get_due_forms(state, forms_to_sync, config, now):
+    """
+    Return the forms whose responses should be synced by this run.
+    """
+    max_staleness_hours = float(config.get('scheduler_max_staleness_hours') or MAX_STALENESS_HOURS)
+    due_forms = {form_id for form_id in forms_to_sync
+                 if is_due(get_activity(state, form_id), now, max_staleness_hours)}
+    LOGGER.info('Scheduler found %d of %d forms due for their responses', len(due_forms), len(forms_to_sync))
+    return due_forms
+
+
+def record_activity(state, form_id, responses, now):
+    """
+    Update the response rate(responses per hour) of a form from the responses fetched by this run.
+    The rate is smoothed with the previous one, so a single quiet or busy run does not reset it.
+    The first sync of a form fetches its whole history, which gives no rate, so the rate is
+    measured from the next sync and the form stays due until then.
+    """
+    activity = get_activity(state, form_id)
+    if not activity:
+        state.setdefault(ACTIVITY_KEY, {})[form_id] = {'last_synced': utils.strftime(now)}
+        state_store.record_value(ACTIVITY_KEY)
+        return
+
+    window_start = utils.strptime_to_utc(activity['last_synced'])
+    # At least a second, so forms synced twice within the same second get a finite rate
+    observed_rate = responses / max(hours_between(window_start, now), 1 / 3600)
+    rate = observed_rate
+    if 'rate' in activity:
+        rate = RATE_SMOOTHING * observed_rate + (1 - RATE_SMOOTHING) * activity['rate']
+
+    state.setdefault(ACTIVITY_KEY, {})[form_id] = {'last_synced': utils.strftime(now), 'rate': round(rate, 6)}
+    state_store.record_value(ACTIVITY_KEY)
+
+
+def sync_fairly(stream_class, client, state, catalogs, forms, config, selected_streams, records_count):
+    """
+    Sync the responses of the forms one page at a time, interleaving the pages of all the forms.
+    The next page is always fetched for the form with the fewest pages fetched by this run,
+    then the smallest backlog(the pages left to fetch), so a form with a large backlog cannot
+    delay the new responses of the others. Returns the number of responses fetched per form.
+    """
+    tasks = []
+    for form_id in forms:
+        stream_obj = stream_class(config)
+        stream_obj.start_form(client, state, catalogs, form_id, config['start_date'], selected_streams, records_count)
+        tasks.append(stream_obj)
+
+    # Before their first page, forms with the most recent bookmarks are expected to have the smallest backlog
+    tasks.sort(key=lambda task: task.request_params['since'], reverse=True)
+    queue = [(0, 0, order, task) for order, task in enumerate(tasks)]
+    heapq.heapify(queue)
+    while queue:
+        _, _, order, task = heapq.heappop(queue)
+        if not run_control.should_stop():
+            with run_report.track(task.tap_stream_id, task.form_id):
+                task.sync_page()
+        # A stopping sync checkpoints every form with pages left
+        if task.form_done or run_control.should_stop():
+            if not task.pages_fetched:
+                run_report.skip(task.tap_stream_id, task.form_id, 'stopped')
+            task.finish_form()
+            state_store.checkpoint(state)
+        else:
+            heapq.heappush(queue, (task.pages_fetched, task.page_count - 1, order, task))
+
+    return {task.form_id: task.fetched_count for task in tasks}
@@ -0,0 +1,163 @@
+import copy
+import hashlib
+import json
+import sys
+
+import singer
+from tap_typeform.state_store import SHARD_WEIGHTS_KEY, SHARDS_KEY, merge_bookmark
+
+
+LOGGER = singer.get_logger()
+
+
+def parse_shard(shard):
+    """
+    Parse a shard given as `i/N`, the i-th(starting at 0) of N shards.
+    """
+    if not shard:
+        return None
+    try:
+        index, count = (int(value) for value in str(shard).split('/'))
+    except ValueError:
+        index, count = -1, 0
+    if not 0 <= index < count:
+        raise Exception("Invalid shard {}, it should be i/N with 0 <= i < N.".format(shard))
+    return index, count
+
+
+def pop_shard_arg(argv):
+    """
+    Remove the `--shard i/N` argument from the command line arguments and return its value.
+    """
+    for position, arg in enumerate(argv):
+        if arg == '--shard' and position + 1 < len(argv):
+            value = argv[position + 1]
+            del argv[position:position + 2]
+            return value
+        if arg.startswith('--shard='):
+            del argv[position]
+            return arg.split('=', 1)[1]
+    return None
+
+
+def form_hash(form_id):
+    # The built-in hash of strings changes between processes
+    return int(hashlib.md5(form_id.encode('utf-8')).hexdigest(), 16)
+
+
+def compute_weights(state):
+    """
+    Return the weight of each form from its response rate saved by the adaptive scheduling.
+    Every form weighs at least one, the requests made for it whatever its responses.
+    """
+    return {form_id: 1 + activity.get('rate', 0) for form_id, activity in state.get('form_activity', {}).items()}
+
+
+def get_digest(weights):
+    return hashlib.sha256(json.dumps(weights, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_weights(state):
+    """
+    Return the weights saved in the state by the merge of the states of the shards, or None.
+    Shards given different weights would not assign the forms to disjoint shards, so only the
+    weights of a merged state are used. The shards log their digest to compare them.
+    """
+    shard_weights = state.get(SHARD_WEIGHTS_KEY)
+    if not shard_weights or get_digest(shard_weights.get('weights')) != shard_weights.get('digest'):
+        LOGGER.warning('The state has no weights from the merge of the states of the shards, '
+                       'the forms are assigned by the hash of their id')
+        return None
+    LOGGER.info('Assigning the forms by the shard weights %s', shard_weights['digest'][:12])
+    return shard_weights['weights']
+
+
+def assign_forms(forms, index, count, weights=None):
+    """
+    Return the forms of the shard `index` out of `count` shards.
+    Without weights, forms are assigned by a stable hash of their id. With weights, forms are
+    assigned heaviest first to the least loaded shard, which gives the same assignment in
+    every process as long as they are given the same weights.
+    """
+    if not weights:
+        return {form_id for form_id in forms if form_hash(form_id) % count == index}
+
+    loads = [0] * count
+    shard_forms = set()
+    for form_id in sorted(forms, key=lambda form_id: (-weights.get(form_id, 1), form_id)):
+        shard_index = loads.index(min(loads))
+        loads[shard_index] += weights.get(form_id, 1)
+        if shard_index == index:
+            shard_forms.add(form_id)
+    return shard_forms
+
+
+def get_shard_forms(config, state, forms):
+    """
+    Return the forms of the shard set in the config, from all the forms to sync.
+    """
+    index, count = parse_shard(config['shard'])
+    weights = get_weights(state) if config.get('shard_balance') == 'activity' else None
+    shard_forms = assign_forms(forms, index, count, weights)
+    LOGGER.info('Shard %s syncs %d of %d forms', config['shard'], len(shard_forms), len(forms))
+    return [form_id for form_id in forms if form_id in shard_forms]
+
+
+def merge_state(state, other):
+    """
+    Merge the `other` state into `state`, keeping the most recent bookmarks.
+    """
+    for key, value in other.items():
+        if key == 'bookmarks':
+            bookmarks = state.setdefault('bookmarks', {})
+            for stream_name, stream_bookmarks in value.items():
+                merged = bookmarks.setdefault(stream_name, {})
+                for bookmark_key, bookmark in stream_bookmarks.items():
+                    merged[bookmark_key] = merge_bookmark(merged.get(bookmark_key), bookmark)
+        elif isinstance(value, dict) and isinstance(state.get(key), dict):
+            merge_state(state[key], value)
+        else:
+            state[key] = value
+    return state
+
+
+def flatten_state(state):
+    """
+    Return the state with the namespaces of all the shards merged into it, so the forms of a
+    shard are found whatever shard synced them before.
+    """
+    flat_state = copy.deepcopy({key: value for key, value in state.items() if key != SHARDS_KEY})
+    for namespace in sorted(state.get(SHARDS_KEY, {})):
+        merge_state(flat_state, state[SHARDS_KEY][namespace])
+    return flat_state
+
+
+def merge_states(states):
+    """
+    Merge the states written by the shards of a sync into one state.
+    """
+    merged = {}
+    for state in states:
+        merged.setdefault(SHARDS_KEY, {}).update(state.get(SHARDS_KEY, {}))
+        merge_state(merged, {key: value for key, value in state.items() if key not in (SHARDS_KEY, SHARD_WEIGHTS_KEY)})
+
+    # Saved with the merged state, so every shard given it assigns the forms with the same weights
+    weights = compute_weights(flatten_state(merged))
+    if weights:
+        merged[SHARD_WEIGHTS_KEY] = {'weights': weights, 'digest': get_digest(weights)}
+    return merged
+
+
+def main():
+    """
+    Print the merge of the state files given as arguments.
+    """
+    states = []
+    for path in sys.argv[1:]:
+        with open(path) as state_file:
+            states.append(json.load(state_file))
+    json.dump(merge_states(states), sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
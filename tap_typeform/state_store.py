@@ -0,0 +1,297 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+import singer
+from tap_typeform import output
+
+
+LOGGER = singer.get_logger()
+
+SHARDS_KEY = 'shards'
+# The weights of the forms computed when the states of the shards are merged, given to every shard
+SHARD_WEIGHTS_KEY = 'shard_weights'
+# Id of the database of the `sqlite` backend per path, saved in the state to match them
+STATE_DB_KEY = 'state_db'
+
+
+def merge_bookmark(current, other):
+    """
+    Merge two bookmark values keeping the most recent one.
+    Form bookmarks are compared by their replication value and kept whole, so the
+    landing ids saved with a bookmark stay with it.
+    """
+    if current is None:
+        return other
+    if other is None:
+        return current
+    if isinstance(current, dict) and isinstance(other, dict):
+        return other if bookmark_value(other) > bookmark_value(current) else current
+    return max(current, other)
+
+
+def exclude_keys(value, keys):
+    """
+    Return a copy of the state without the entries of `keys`, at any depth.
+    """
+    if not isinstance(value, dict):
+        return value
+    return {key: exclude_keys(item, keys) for key, item in value.items() if key not in keys}
+
+
+def bookmark_value(form_bookmark):
+    return max((value for value in form_bookmark.values() if isinstance(value, str)), default='')
+
+
+class StateStore:
+    """
+    Keeps the state in memory and emits the whole state at every checkpoint.
+    A checkpoint is only emitted when bookmarks were updated since the previous one, and
+    once `checkpoint_every` bookmarks were updated, `checkpoint_seconds` seconds passed or
+    `checkpoint_records` records were written. Without any of them every update is emitted.
+    """
+
+    def __init__(self, checkpoint_every=None, checkpoint_seconds=None, checkpoint_records=None):
+        if not (checkpoint_every or checkpoint_seconds or checkpoint_records):
+            checkpoint_every = 1
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_seconds = checkpoint_seconds
+        self.checkpoint_records = checkpoint_records
+        self.changes = {}
+        self.value_changes = set()
+        self.state = None
+        self.namespace = None
+        self.excluded_forms = frozenset()
+        self.last_checkpoint = time.monotonic()
+        self.last_records = output.records_written()
+
+    def load(self, state):
+        pass
+
+    def write_state(self, value):
+        """
+        Write a STATE message. A shard writes its state under its namespace, without the
+        forms of the other shards, so the states of all the shards can be merged. The shard
+        weights are computed again by the merge, so they are not written.
+        """
+        if self.namespace:
+            value = {SHARDS_KEY: {self.namespace: exclude_keys(value, self.excluded_forms | {SHARD_WEIGHTS_KEY})}}
+        output.write_state(value)
+
+    def record_bookmark(self, stream_name, key):
+        """
+        Record that the bookmark `key` of the stream(a form id, or the replication key of
+        streams not synced per form) was updated in the state.
+        """
+        self.changes.setdefault(stream_name, set()).add(key)
+
+    def record_value(self, key):
+        """
+        Record that the top level `key` of the state, other than the bookmarks, was updated.
+        It is emitted with the next checkpoint, but does not make a checkpoint due by itself.
+        """
+        self.value_changes.add(key)
+
+    def pending_changes(self):
+        return sum(len(keys) for keys in self.changes.values())
+
+    def checkpoint_value(self, state):
+        return state
+
+    def checkpoint_due(self):
+        if self.checkpoint_every and self.pending_changes() >= self.checkpoint_every:
+            return True
+        if self.checkpoint_seconds and time.monotonic() - self.last_checkpoint >= self.checkpoint_seconds:
+            return True
+        if self.checkpoint_records and output.records_written() - self.last_records >= self.checkpoint_records:
+            return True
+        return False
+
+    def checkpoint(self, state, force=False):
+        """
+        Emit a STATE message if bookmarks were updated and the checkpoint is due.
+        Checkpoints without any updated bookmark are skipped, so they merge into the next one.
+        """
+        self.state = state
+        if not (self.changes or self.value_changes) or not (force or self.checkpoint_due()):
+            return
+        self.write_state(self.checkpoint_value(state))
+        self.changes = {}
+        self.value_changes = set()
+        self.last_checkpoint = time.monotonic()
+        self.last_records = output.records_written()
+
+    def flush(self):
+        """
+        Emit the pending bookmark updates of the last checkpointed state.
+        """
+        if self.state is not None:
+            self.checkpoint(self.state, force=True)
+
+    def close(self, state):
+        """
+        Emit the pending changes, the last STATE message holds the full state.
+        """
+        if self.changes or self.value_changes:
+            self.write_state(state)
+        self.changes = {}
+        self.value_changes = set()
+        self.state = None
+
+
+class SQLiteStateStore(StateStore):
+    """
+    Persists every bookmark update to a local SQLite database and emits compact STATE
+    messages containing only the bookmarks and state values updated since the previous checkpoint.
+    The database has an id saved in the state it emits, a run given a state emitted with this
+    database resumes from its bookmarks, so a run interrupted after a compact checkpoint
+    resumes from the full set of bookmarks. The full state is emitted when the store is closed
+    at the end of the sync.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        # Used by the threads of concurrent streams, which hold the module lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS bookmarks ('
+            'stream TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (stream, key))')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS state_values (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        self.connection.commit()
+
+    def get_id(self):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'id'").fetchone()
+        return row[0] if row else None
+
+    def load(self, state):
+        """
+        Fill in the bookmarks and state values the state lacks from the database, if the state was
+        emitted with this database. The bookmarks of the state are kept, so a bookmark rewound in the state
+        is respected. The bookmarks of a database the state was not emitted with are discarded.
+        """
+        bookmarks = state.setdefault('bookmarks', {})
+        db_ids = state.setdefault(STATE_DB_KEY, {})
+        db_id = self.get_id()
+        if db_id is None or db_ids.get(self.path) != db_id:
+            count = self.connection.execute('SELECT COUNT(*) FROM bookmarks').fetchone()[0]
+            if count:
+                LOGGER.warning('Discarding the %d bookmarks of %s, the state was not emitted with this database',
+                               count, self.path)
+            db_ids[self.path] = uuid.uuid4().hex
+            self.connection.execute('DELETE FROM bookmarks')
+            self.connection.execute('DELETE FROM state_values')
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('id', ?)", (db_ids[self.path],))
+            self.connection.commit()
+            self.record_value(STATE_DB_KEY)
+            return
+
+        loaded = 0
+        for stream_name, key, value in self.connection.execute('SELECT stream, key, value FROM bookmarks'):
+            stream_bookmarks = bookmarks.setdefault(stream_name, {})
+            if key not in stream_bookmarks:
+                stream_bookmarks[key] = json.loads(value)
+                loaded += 1
+        for key, value in self.connection.execute('SELECT key, value FROM state_values'):
+            state.setdefault(key, json.loads(value))
+        LOGGER.info('Loaded %d bookmarks missing from the state from %s', loaded, self.path)
+
+    def checkpoint_value(self, state):
+        """
+        Save the updated bookmarks and state values to the database and return them as a compact
+        state. The id of the database is in every compact state, to resume from the last one.
+        """
+        bookmarks = state.get('bookmarks', {})
+        compact_bookmarks = {
+            stream_name: {key: bookmarks[stream_name][key] for key in keys}
+            for stream_name, keys in self.changes.items()
+        }
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO bookmarks (stream, key, value) VALUES (?, ?, ?)',
+            [(stream_name, key, json.dumps(value))
+             for stream_name, stream_bookmarks in compact_bookmarks.items()
+             for key, value in stream_bookmarks.items()])
+        values = {key: state[key] for key in self.value_changes | {STATE_DB_KEY} if key in state}
+        self.connection.executemany('INSERT OR REPLACE INTO state_values (key, value) VALUES (?, ?)',
+                                    [(key, json.dumps(value)) for key, value in values.items()])
+        # The values removed from the state are not filled in again
+        self.connection.executemany('DELETE FROM state_values WHERE key = ?',
+                                    [(key,) for key in self.value_changes if key not in state])
+        self.connection.commit()
+        return {**values, 'bookmarks': compact_bookmarks}
+
+    def close(self, state):
+        if self.changes or self.value_changes:
+            self.checkpoint_value(state)
+        self.write_state(state)
+        self.changes = {}
+        self.value_changes = set()
+        self.state = None
+        self.connection.close()
+
+
+_store = StateStore()
+# Held while the state is updated or written, streams synced concurrently share the state
+lock = threading.RLock()
+
+
+def configure(config, state):
+    """
+    Build the state store for the sync from the config and load its bookmarks into the state.
+    """
+    global _store
+    cadence = {
+        'checkpoint_every': int(config.get('state_checkpoint_every') or 0),
+        'checkpoint_seconds': float(config.get('state_checkpoint_seconds') or 0),
+        'checkpoint_records': int(config.get('state_checkpoint_records') or 0),
+    }
+    if config.get('state_backend') == 'sqlite':
+        # The database must be kept between runs, which a default path in the working directory does not ensure
+        if not config.get('state_db_path'):
+            raise Exception("The `sqlite` state backend requires a `state_db_path`.")
+        _store = SQLiteStateStore(config['state_db_path'], **cadence)
+    else:
+        _store = StateStore(**cadence)
+    _store.load(state)
+    _store.state = state
+    return _store
+
+
+def get_store():
+    return _store
+
+
+def set_namespace(namespace, excluded_forms):
+    _store.namespace = namespace
+    _store.excluded_forms = frozenset(excluded_forms)
+
+
+def record_bookmark(stream_name, key):
+    _store.record_bookmark(stream_name, key)
+
+
+def record_value(key):
+    _store.record_value(key)
+
+
+def checkpoint(state, force=False):
+    with lock:
+        _store.checkpoint(state, force)
+
+
+def close(state):
+    with lock:
+        _store.close(state)
+
+
+def flush():
+    with lock:
+        _store.flush()
+
+
+# Registered after the output layer, so the pending state is written before the output is closed
+atexit.register(flush)
@@ -1,23 +1,36 @@
 import json
-import pendulum
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import singer
 from singer import bookmarks
 
+# Discover imports the streams for their metadata only, the modules of the sync are imported
+# by the functions using them, to keep discover fast
 
 LOGGER = singer.get_logger()
 
+RESUME_KEY = 'page_checkpoints'
+FORMS_PAGE_WORKERS = 1
 
-def write_records(catalog_entry, tap_stream_id, records):
+
+def write_records(catalog_entry, tap_stream_id, records, form_id=None):
+    from tap_typeform import output, phase_timers, run_report
     extraction_time = singer.utils.now()
     stream_metadata = singer.metadata.to_map(catalog_entry['metadata'])
     stream_schema = catalog_entry['schema']
+    transform_seconds = emit_seconds = 0
     with singer.metrics.record_counter(tap_stream_id) as counter:
         with singer.Transformer() as transformer:
             for rec in records:
+                start = phase_timers.clock()
                 rec = transformer.transform(rec, stream_schema, stream_metadata)
-                singer.write_record(tap_stream_id, rec, time_extracted=extraction_time)
+                transformed = phase_timers.clock()
+                output.write_record(tap_stream_id, rec, time_extracted=extraction_time)
+                transform_seconds += transformed - start
+                emit_seconds += phase_timers.clock() - transformed
         counter.increment(len(records))
+    phase_timers.add_phases(tap_stream_id, form_id, {'transform': transform_seconds, 'emit': emit_seconds})
+    run_report.add(tap_stream_id, form_id, records_emitted=len(records))
 
 def get_bookmark(state, stream_name, form_id, bookmark_key, start_date):
     """
@@ -49,18 +62,97 @@ def get_schema(catalog, stream_id):
     stream_catalog = [cat for cat in catalog if cat['tap_stream_id'] == stream_id ][0]
     return stream_catalog
 
-def write_bookmarks(stream, selected_streams, form_id, bookmark_value, state):
+def write_bookmarks(stream, selected_streams, form_id, bookmark_value, state, boundaries=None):
+    from tap_typeform import state_store
     stream_obj = STREAMS[stream]()
-    # If the stream is selected, write the bookmark.
+    # If the stream is selected and its bookmark advanced, write the bookmark.
     if stream in selected_streams:
         if form_id:
-            singer.write_bookmark(state, stream_obj.tap_stream_id, form_id, {stream_obj.replication_keys[0]: bookmark_value})
-        else:
+            form_bookmark = {stream_obj.replication_keys[0]: bookmark_value}
+
+            # Keep the landings emitted at the bookmark, so they are not emitted again by the next run
+            boundary = (boundaries or {}).get(stream) or BoundaryIndex.from_state(state, stream, form_id, stream_obj.replication_keys[0])
+            landing_ids = boundary.landing_ids_at(bookmark_value)
+            if landing_ids:
+                form_bookmark['landing_ids'] = landing_ids
+
+            if bookmarks.get_bookmark(state, stream, form_id) != form_bookmark:
+                singer.write_bookmark(state, stream_obj.tap_stream_id, form_id, form_bookmark)
+                state_store.record_bookmark(stream_obj.tap_stream_id, form_id)
+        elif get_bookmark(state, stream, form_id, stream_obj.replication_keys[0], None) != bookmark_value:
             singer.write_bookmark(state, stream_obj.tap_stream_id, stream_obj.replication_keys[0], bookmark_value)
+            state_store.record_bookmark(stream_obj.tap_stream_id, stream_obj.replication_keys[0])
 
     # For each child, write the bookmark if it is selected.
     for child in stream_obj.children:
-        write_bookmarks(child, selected_streams, form_id, bookmark_value, state)
+        write_bookmarks(child, selected_streams, form_id, bookmark_value, state, boundaries)
+
+def get_resume(state, stream_name, form_id):
+    """
+    Return the page checkpoint of the form, if the page budget stopped its previous sync.
+    """
+    return state.get(RESUME_KEY, {}).get(stream_name, {}).get(form_id)
+
+def write_resume(state, stream_name, form_id, resume):
+    """
+    Save the page checkpoint of the form, or clear it when `resume` is None.
+    """
+    from tap_typeform import state_store
+    stream_resume = state.get(RESUME_KEY, {}).get(stream_name, {})
+    if resume is None:
+        if form_id not in stream_resume:
+            return
+        del stream_resume[form_id]
+    else:
+        state.setdefault(RESUME_KEY, {}).setdefault(stream_name, {})[form_id] = resume
+    state_store.record_value(RESUME_KEY)
+
+class BoundaryIndex:
+    """
+    Tracks the landing ids emitted at the latest replication value of a stream for a form.
+    The `since` filter of the API is inclusive and truncated to seconds, so the landings at
+    the bookmark are fetched again by the next run. The ids saved with the bookmark are
+    used to skip exact re-emissions of those landings.
+    """
+
+    def __init__(self, bookmark, landing_ids=()):
+        self.bookmark = bookmark
+        self.emitted_ids = set(landing_ids)
+        self.value = bookmark
+        self.landing_ids = set(landing_ids)
+
+    @classmethod
+    def from_state(cls, state, stream_name, form_id, bookmark_key, start_date=None):
+        form_bookmark = bookmarks.get_bookmark(state, stream_name, form_id, {})
+        return cls(form_bookmark.get(bookmark_key, start_date), form_bookmark.get('landing_ids', []))
+
+    def is_emitted(self, value, landing_id):
+        """
+        Return whether the landing was emitted at the bookmark by a previous run.
+        """
+        return value == self.bookmark and landing_id in self.emitted_ids
+
+    def add(self, value, landing_id):
+        if self.value is None or value > self.value:
+            self.value = value
+            self.landing_ids = {landing_id}
+        elif value == self.value:
+            self.landing_ids.add(landing_id)
+
+    def merge(self, other):
+        """
+        Merge the landings tracked by another index of the same stream and form.
+        """
+        if self.value is None or (other.value is not None and other.value > self.value):
+            self.value = other.value
+            self.landing_ids = set(other.landing_ids)
+        elif other.value == self.value:
+            self.landing_ids |= other.landing_ids
+
+    def landing_ids_at(self, bookmark_value):
+        if self.value == bookmark_value:
+            return sorted(landing_id for landing_id in self.landing_ids if landing_id is not None)
+        return []
 
 class Stream:
     """
@@ -79,23 +171,46 @@ class Stream:
     data_key = None
     child_data_key = None
     records_count = {}
+    fetched_count = 0
+
+    def __init__(self, config=None):
+        self.config = config or {}
+        self.boundaries = {}
+
+    def get_boundary(self, state, stream_name, form_id, start_date):
+        """
+        Return the boundary index of the stream for the form being synced.
+        """
+        if stream_name not in self.boundaries:
+            self.boundaries[stream_name] = BoundaryIndex.from_state(
+                state, stream_name, form_id, STREAMS[stream_name].replication_keys[0], start_date)
+        return self.boundaries[stream_name]
 
     def add_fields_at_1st_level(self, record, additional_data={}):
         pass
 
     def sync_child_stream(self, record, catalogs, state, selected_stream_ids, form_id, start_date, max_bookmark):
 
+        from tap_typeform import phase_timers, run_report
         for child in self.children:
-            child_obj = STREAMS[child]()
+            child_obj = STREAMS[child](self.config)
             child_bookmark = get_bookmark(state, child_obj.tap_stream_id, form_id, self.replication_keys[0], start_date)
+            child_boundary = self.get_boundary(state, child, form_id, start_date)
+            child_value = record[child_obj.replication_keys[0]]
 
-            if child in selected_stream_ids and record[child_obj.replication_keys[0]] >= child_bookmark and record[self.child_data_key]:
+            if child in selected_stream_ids and child_value >= child_bookmark and record[self.child_data_key] \
+                    and not child_boundary.is_emitted(child_value, record.get('landing_id')):
+                child_boundary.add(child_value, record.get('landing_id'))
                 child_catalog = get_schema(catalogs, child)
+                start = phase_timers.clock()
                 for rec in record[self.child_data_key]:
                     child_obj.add_fields_at_1st_level(rec, {**record, "_sdc_form_id": form_id})
-                write_records(child_catalog, child_obj.tap_stream_id, record[self.child_data_key])
+                phase_timers.add(child_obj.tap_stream_id, form_id, 'flatten', phase_timers.clock() - start)
+                write_records(child_catalog, child_obj.tap_stream_id, record[self.child_data_key], form_id)
                 self.records_count[child_obj.tap_stream_id] += len(record[self.child_data_key])
                 max_bookmark = max(max_bookmark, record[child_obj.replication_keys[0]])
+            elif child in selected_stream_ids and record[self.child_data_key]:
+                run_report.add(child_obj.tap_stream_id, form_id, records_filtered=len(record[self.child_data_key]))
         return max_bookmark
 
 class IncrementalStream(Stream):
@@ -104,33 +219,77 @@ class IncrementalStream(Stream):
 
     def write_records(self, records, catalogs, selected_stream_ids,
                         form_id, max_bookmark, state, start_date):
+        from tap_typeform import output, phase_timers, run_report
         stream_catalog = get_schema(catalogs, self.tap_stream_id)
         bookmark = get_bookmark(state, self.tap_stream_id, form_id, self.replication_keys[0], start_date)
+        boundary = self.get_boundary(state, self.tap_stream_id, form_id, start_date)
 
+        flatten_seconds = transform_seconds = emit_seconds = 0
+        emitted = 0
         with singer.metrics.record_counter(self.tap_stream_id) as counter: 
             with singer.Transformer() as transformer:
                 extraction_time = singer.utils.now()
                 stream_metadata = singer.metadata.to_map(stream_catalog['metadata'])
 
                 for record in records:
+                    start = phase_timers.clock()
                     self.add_fields_at_1st_level(record, {"_sdc_form_id": form_id})
-                    if self.tap_stream_id in selected_stream_ids and record[self.replication_keys[0]] >= bookmark:
+                    flatten_seconds += phase_timers.clock() - start
+                    if self.tap_stream_id in selected_stream_ids and record[self.replication_keys[0]] >= bookmark \
+                            and not boundary.is_emitted(record[self.replication_keys[0]], record.get('landing_id')):
+                        boundary.add(record[self.replication_keys[0]], record.get('landing_id'))
+                        start = phase_timers.clock()
                         rec = transformer.transform(record, stream_catalog['schema'], stream_metadata)
-                        singer.write_record(self.tap_stream_id, rec, time_extracted=extraction_time)
+                        transformed = phase_timers.clock()
+                        output.write_record(self.tap_stream_id, rec, time_extracted=extraction_time)
+                        transform_seconds += transformed - start
+                        emit_seconds += phase_timers.clock() - transformed
                         max_bookmark = max(max_bookmark, record[self.replication_keys[0]])
                         counter.increment(1)
                         self.records_count[self.tap_stream_id] += 1
+                        emitted += 1
 
                     # Write selected child records
                     if self.children and self.child_data_key in record:
                         max_bookmark =  self.sync_child_stream(record, catalogs, state, selected_stream_ids,form_id, start_date, max_bookmark)
 
+        phase_timers.add_phases(self.tap_stream_id, form_id,
+                                {'flatten': flatten_seconds, 'transform': transform_seconds, 'emit': emit_seconds})
+        if self.tap_stream_id in selected_stream_ids:
+            run_report.add(self.tap_stream_id, form_id, records_emitted=emitted, records_filtered=len(records) - emitted)
         return max_bookmark
 
     def sync_obj(self, client, state, catalogs, form_id,
                     start_date, selected_stream_ids, records_count):
+        from tap_typeform import run_control, state_store
+        self.start_form(client, state, catalogs, form_id, start_date, selected_stream_ids, records_count)
+        # A stopping sync finishes the current page and checkpoints the form
+        while not self.form_done and not run_control.should_stop():
+            self.sync_page()
+        self.finish_form()
+        state_store.checkpoint(state)
+
+    def start_form(self, client, state, catalogs, form_id,
+                    start_date, selected_stream_ids, records_count):
+        """
+        Prepare the sync of the responses of a form, which are then fetched one page at a time
+        by `sync_page`. A form stopped by its page budget in a previous run resumes from the
+        page it stopped at.
+        """
+        from tap_typeform import pipeline
+        # Imported when syncing only, it is slow to import and discover does not need it
+        import pendulum
+
         self.records_count = records_count
-        full_url = client.build_url(self.endpoint).format(form_id)
+        self.boundaries = {}
+        self.fetched_count = 0
+        self.client = client
+        self.state = state
+        self.catalogs = catalogs
+        self.form_id = form_id
+        self.start_date = start_date
+        self.selected_stream_ids = selected_stream_ids
+        self.full_url = client.build_url(self.endpoint).format(form_id)
         current_time = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
         bookmark = get_bookmark(state, self.tap_stream_id, form_id, self.replication_keys[0], start_date)
 
@@ -139,24 +298,106 @@ class IncrementalStream(Stream):
                                                 current_time, start_date, state, form_id, self.replication_keys[0])
         LOGGER.info('Syncing  stream {} - form: {} start_date: {}'.format(
                     self.tap_stream_id, form_id, pendulum.parse(min_bookmark_value).strftime("%Y-%m-%d %H:%M")))
-        max_bookmark = bookmark
-        page_count = 2
-        params = {**self.params, "page_size": client.page_size}
-        params['since'] = int(pendulum.parse(min_bookmark_value).timestamp())
-
-        while page_count > 1:
-            response = client.request(full_url, params)
+        self.max_bookmark = bookmark
+        self.page_count = 2
+        self.pages_fetched = 0
+        self.page_budget = int(self.config.get('form_page_budget') or 0)
+        self.form_done = False
+        self.request_params = {**self.params, "page_size": client.page_size}
+        self.request_params['since'] = int(pendulum.parse(min_bookmark_value).timestamp())
+
+        # Continue the pages left by the previous run, the bookmarks are written once they are all synced
+        resume = get_resume(state, self.tap_stream_id, form_id)
+        if resume:
+            LOGGER.info('Resuming stream {} - form: {} from its page checkpoint'.format(self.tap_stream_id, form_id))
+            self.request_params['before'] = resume['before']
+            self.max_bookmark = max(self.max_bookmark, resume['max_bookmark'])
+            for stream_name, landing_ids in resume.get('boundaries', {}).items():
+                boundary = self.get_boundary(state, stream_name, form_id, start_date)
+                for landing_id in landing_ids:
+                    boundary.add(resume['max_bookmark'], landing_id)
+
+        # Hand the pages to the transform workers if they are running
+        self.page_pipeline = None
+        if pipeline.enabled():
+            self.page_pipeline = pipeline.PagePipeline(self, catalogs, selected_stream_ids,
+                                                       form_id, state, start_date, self.max_bookmark)
+
+    def sync_page(self):
+        """
+        Fetch and write the next page of responses of the form.
+        """
+        from tap_typeform import memory, phase_timers, progress, run_report
+        with memory.track(self.tap_stream_id, self.form_id, page=True):
+            with phase_timers.context(self.tap_stream_id, self.form_id):
+                response = self.client.request(self.full_url, self.request_params)
             records = response[self.data_key]
-            max_bookmark = self.write_records(records, catalogs, selected_stream_ids,
-                                                    form_id, max_bookmark, state, start_date)
-            page_count = response.get('page_count', 0)
-
-            # To get the next page, set param field
+            self.page_count = response.get('page_count', 0)
+            self.fetched_count += len(records)
+            self.pages_fetched += 1
+            run_report.add(self.tap_stream_id, self.form_id, pages=1)
+            # Without `total_items`, the page count estimates the responses left
+            progress.add_page(self.tap_stream_id, self.form_id, len(records),
+                              response.get('total_items', self.page_count * len(records)))
+
+            # To get next page, set param field
             if records:
-                params['before'] = records[-1].get('token')
+                self.request_params['before'] = records[-1].get('token')
+
+            if self.page_pipeline:
+                self.page_pipeline.submit(records)
+            else:
+                self.max_bookmark = self.write_records(records, self.catalogs, self.selected_stream_ids,
+                                                       self.form_id, self.max_bookmark, self.state, self.start_date)
+
+        self.form_done = self.page_count <= 1 or bool(self.page_budget and self.pages_fetched >= self.page_budget)
+
+    def finish_form(self):
+        """
+        Write the bookmarks of the form, or a page checkpoint if the page budget stopped it
+        before the oldest page. The responses are fetched newest first, so the bookmarks
+        only move once all the pages since them were synced.
+        """
+        from tap_typeform import progress, state_store
+        if self.page_pipeline:
+            self.max_bookmark = self.page_pipeline.drain()
+
+        # Stopped before its first page, the form is left as it was
+        if not self.pages_fetched:
+            return
 
-        write_bookmarks(self.tap_stream_id, selected_stream_ids, form_id, max_bookmark, state)
-        singer.write_state(state)
+        progress.finish_form(self.tap_stream_id, self.form_id)
+
+        with state_store.lock:
+            self.write_form_state()
+
+    def get_stop_reason(self):
+        """
+        Return why the sync of the form stopped before its oldest page.
+        """
+        from tap_typeform import run_control
+        if run_control.get_stop_reason():
+            return run_control.get_stop_reason()
+        if self.page_budget and self.pages_fetched >= self.page_budget:
+            return 'page budget reached'
+        # Otherwise the backfill lane stopped the form once its own budget was used
+        return 'backfill lane budget used'
+
+    def write_form_state(self):
+        if self.page_count > 1:
+            LOGGER.info('Stopped stream {} - form: {} with {} pages left: {}'.format(
+                        self.tap_stream_id, self.form_id, self.page_count - 1, self.get_stop_reason()))
+            write_resume(self.state, self.tap_stream_id, self.form_id, {
+                'before': self.request_params['before'],
+                'max_bookmark': self.max_bookmark,
+                'boundaries': {stream_name: boundary.landing_ids_at(self.max_bookmark)
+                               for stream_name, boundary in self.boundaries.items()
+                               if boundary.landing_ids_at(self.max_bookmark)},
+            })
+        else:
+            write_resume(self.state, self.tap_stream_id, self.form_id, None)
+            write_bookmarks(self.tap_stream_id, self.selected_stream_ids, self.form_id,
+                            self.max_bookmark, self.state, self.boundaries)
 
 class FullTableStream(Stream):
     endpoint = 'forms/{}'
@@ -165,21 +406,25 @@ class FullTableStream(Stream):
 
     def sync_obj(self, client, state, catalogs, form_id,
                     start_date, selected_stream_ids, records_count):
+        from tap_typeform import phase_timers
         LOGGER.info('Syncing  stream {} - form: {}'.format(
                     self.tap_stream_id, form_id))
         self.records_count = records_count
         full_url = client.build_url(self.endpoint).format(form_id)
         stream_catalog = get_schema(catalogs, self.tap_stream_id)
-        response = client.request(full_url, params=self.params)
+        with phase_timers.context(self.tap_stream_id, form_id):
+            response = client.request(full_url, params=self.params)
 
         if self.data_key not in response:
             LOGGER.info('There are no questions associated with form {}'.format(form_id))
             return
 
+        start = phase_timers.clock()
         for record in response[self.data_key]:
             self.add_fields_at_1st_level(record, {"form_id": form_id})
+        phase_timers.add(self.tap_stream_id, form_id, 'flatten', phase_timers.clock() - start)
 
-        write_records(stream_catalog, self.tap_stream_id, response[self.data_key])
+        write_records(stream_catalog, self.tap_stream_id, response[self.data_key], form_id)
         self.records_count[self.tap_stream_id] += len(response[self.data_key])
 
 class Forms(IncrementalStream):
@@ -195,31 +440,52 @@ class Forms(IncrementalStream):
     }
 
     def get_forms(self, client):
+        """
+        Yield the pages of forms in order. Once the first page gives the page count, the other
+        pages are fetched concurrently by `forms_page_workers` threads, in the context of the caller.
+        """
+        from tap_typeform import phase_timers
         full_url = client.build_url(self.endpoint)
-        page = 1
-        paginate = True
         params = {**self.params, "page_size": client.form_page_size}
-        while paginate:
-            params['page'] = page
-            response = client.request(full_url, params=params)
-            page_count = response.get('page_count')
-            paginate = page_count > page
-            page += 1
-            yield response.get(self.data_key)
+
+        def get_page(page):
+            return client.request(full_url, params={**params, 'page': page})
+
+        response = get_page(1)
+        yield response.get(self.data_key)
+
+        pages = range(2, response.get('page_count') + 1)
+        workers = int(self.config.get('forms_page_workers') or FORMS_PAGE_WORKERS)
+        if workers <= 1 or len(pages) <= 1:
+            for page in pages:
+                yield get_page(page).get(self.data_key)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=min(workers, len(pages)))
+        try:
+            for response in executor.map(phase_timers.bind_context(get_page), pages):
+                yield response.get(self.data_key)
+        finally:
+            # The pages not fetched yet are dropped if the caller stops early
+            executor.shutdown(cancel_futures=True)
 
     def sync_obj(self, client, state, catalogs,
                     start_date, selected_stream_ids, records_count):
+        from tap_typeform import phase_timers, run_control, state_store
         self.records_count = records_count
         bookmark = state.get('bookmarks',{}).get(self.tap_stream_id,{}).get(self.replication_keys[0], start_date)
         max_bookmark = bookmark
 
-        for records in self.get_forms(client):
-            
-            max_bookmark = self.write_records(records, catalogs, selected_stream_ids,
-                        None, max_bookmark, state, start_date)
-            write_bookmarks(self.tap_stream_id, selected_stream_ids, None, max_bookmark, state)
+        with phase_timers.context(self.tap_stream_id, None):
+            for records in self.get_forms(client):
+                if run_control.should_stop():
+                    break
+
+                max_bookmark = self.write_records(records, catalogs, selected_stream_ids,
+                            None, max_bookmark, state, start_date)
+                write_bookmarks(self.tap_stream_id, selected_stream_ids, None, max_bookmark, state)
 
-        singer.write_state(state)
+        state_store.checkpoint(state)
 
 class Questions(FullTableStream):
     tap_stream_id = 'questions'
@@ -1,5 +1,12 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import singer
+from singer import utils
 from tap_typeform.streams import STREAMS
+from tap_typeform import backfill, http_metrics, memory, output, phase_timers, pipeline, preflight, profiling, progress, \
+    run_control, run_report, scheduler, shard, state_store
 
 LOGGER = singer.get_logger()
 
@@ -13,7 +20,7 @@ def write_schemas(stream_id, catalog, selected_streams):
     if stream_id in selected_streams:
         # Get catalog object for a particular stream.
         stream = [cat for cat in catalog['streams'] if cat['tap_stream_id'] == stream_id ][0]
-        singer.write_schema(stream_id, stream['schema'], stream['key_properties'])
+        output.write_schema(stream_id, stream['schema'], stream['key_properties'])
 
     for child in stream_obj.children:
         write_schemas(child, catalog, selected_streams)
@@ -48,6 +55,9 @@ def sync(client, config, state, catalog, forms_to_sync):
     Sync selected streams.
     """
 
+    started = time.monotonic()
+    started_at = utils.now()
+
     # Get selected streams, make sure stream dependencies are met
     selected_streams = get_selected_streams(catalog)
     streams_to_sync = get_stream_to_sync(selected_streams)
@@ -57,24 +67,168 @@ def sync(client, config, state, catalog, forms_to_sync):
     # Initializing a dictionary to keep track of record count by streams
     records_count = {stream:0 for stream in STREAMS.keys()}
 
-    singer.write_state(state)
+    # A shard syncs its own forms, and the `forms` stream is synced by the first shard only
+    all_forms = forms_to_sync
+    if config.get('shard'):
+        state = shard.flatten_state(state)
+        forms_to_sync = shard.get_shard_forms(config, state, list(forms_to_sync))
+        if shard.parse_shard(config['shard'])[0] != 0:
+            streams_to_sync = [stream for stream in streams_to_sync if stream != 'forms']
+
+    output.configure(config)
+    state_store.configure(config, state)
+    if config.get('shard'):
+        state_store.set_namespace(config['shard'], set(all_forms) - set(forms_to_sync))
+    run_control.configure(config)
+    phase_timers.reset()
+    http_metrics.reset()
+    memory.configure(config)
+    run_report.reset()
+    progress.configure(config)
+    state_before = {'bookmarks': copy.deepcopy(state.get('bookmarks', {}))}
+    pipeline.start(config)
+    run_control.install_signal_handlers()
+    status = 'failed'
+    try:
+        with profiling.profile(config, 'run'):
+            sync_streams(client, config, state, catalog, forms_to_sync, selected_streams, streams_to_sync,
+                         records_count)
+        status = 'stopped' if run_control.get_stop_reason() else 'completed'
+    finally:
+        run_control.restore_signal_handlers()
+        pipeline.shutdown()
+        # Written for failed syncs as well, with the form that failed
+        if config.get('run_report_path'):
+            run_report.write(config['run_report_path'], state_before, state, started_at, status, records_count)
+    state_store.close(state)
+    output.close()
+
+    for stream_name, stream_count in records_count.items():
+        LOGGER.info('%s: %d', stream_name, stream_count)
+    phase_timers.log_summary(config.get('phase_timings_per_form'))
+    memory.log_summary()
+    http_metrics.log_summary(time.monotonic() - started)
+
+
+def sync_streams(client, config, state, catalog, forms_to_sync, selected_streams, streams_to_sync, records_count):
+    """
+    Call the sync object of each stream to sync.
+    """
+    now = utils.now()
+    if config.get('backfill_lane'):
+        backfill.plan(state, forms_to_sync, preflight.get_responses_streams(streams_to_sync),
+                      selected_streams, config["start_date"], now)
+
+    responses_forms = list(forms_to_sync)
+    if config.get('adaptive_scheduling'):
+        due_forms = scheduler.get_due_forms(state, forms_to_sync, config, now)
+        responses_forms = [form for form in forms_to_sync if form in due_forms]
+        for form in forms_to_sync:
+            if form not in due_forms:
+                run_report.skip(None, form, 'not due')
+
+    # Number of responses fetched per form, idle forms have none to fetch
+    responses_fetched = {}
+    if config.get('skip_idle_forms'):
+        idle_forms = preflight.get_idle_forms(client, state, responses_forms, selected_streams,
+                                              streams_to_sync, config["start_date"])
+        responses_forms = [form for form in responses_forms if form not in idle_forms]
+        responses_fetched = {form: 0 for form in idle_forms}
+        for form in idle_forms:
+            run_report.skip(None, form, 'idle')
+
+    # The forms not started yet count in the time left of the sync
+    progress.queue(len(responses_forms) * len(preflight.get_responses_streams(streams_to_sync)))
+
+    # The streams synced per form use separate endpoints and bookmarks, with `stream_workers`
+    # they are synced concurrently, each by its own thread
+    stream_workers = int(config.get('stream_workers') or 0)
+    concurrent_streams = []
     for stream in streams_to_sync:
-        stream_obj = STREAMS[stream]()
+        if run_control.should_stop():
+            break
+        stream_obj = STREAMS[stream](config)
 
         # Calling `forms` sync object separately as it does not take called once
         # independent of form ids
         if stream == 'forms' and stream in selected_streams:
             write_schemas(stream, catalog, selected_streams)
 
-            stream_obj.sync_obj(client, state, catalog['streams'], config["start_date"],
-                                selected_streams, records_count)
+            with profiling.profile(config, stream), memory.track(stream, None), run_report.track(stream, None):
+                stream_obj.sync_obj(client, state, catalog['streams'], config["start_date"],
+                                    selected_streams, records_count)
         elif not stream_obj.parent:
             write_schemas(stream, catalog, selected_streams)
 
-            for form in forms_to_sync:
-
-                stream_obj.sync_obj(client, state, catalog['streams'], form, config["start_date"],
-                                    selected_streams, records_count)
-
-    for stream_name, stream_count in records_count.items():
-        LOGGER.info('%s: %d', stream_name, stream_count)
+            if stream_workers > 1:
+                concurrent_streams.append(stream)
+            else:
+                add_counts(responses_fetched, sync_form_stream(
+                    stream, client, config, state, catalog, forms_to_sync, responses_forms,
+                    selected_streams, records_count))
+
+    if concurrent_streams:
+        with ThreadPoolExecutor(max_workers=min(stream_workers, len(concurrent_streams))) as executor:
+            futures = [executor.submit(sync_form_stream, stream, client, config, state, catalog, forms_to_sync,
+                                       responses_forms, selected_streams, records_count)
+                       for stream in concurrent_streams]
+            for future in futures:
+                try:
+                    add_counts(responses_fetched, future.result())
+                except Exception:
+                    # Let the other streams checkpoint their forms before the error is raised
+                    run_control.request_stop('a stream failed')
+                    raise
+
+    # Work through the history of new forms once the incremental syncs are done
+    if config.get('backfill_lane'):
+        with profiling.profile(config, 'backfill'):
+            backfill.sync_lane(client, state, catalog['streams'], forms_to_sync, config, selected_streams,
+                               records_count)
+
+    # Update the response rates of the forms synced by the scheduler, idle forms fetched no responses
+    if config.get('adaptive_scheduling') and preflight.get_responses_streams(streams_to_sync):
+        for form in forms_to_sync:
+            # Forms not reached by a stopped sync are still due
+            if form in due_forms and form in responses_fetched:
+                scheduler.record_activity(state, form, responses_fetched.get(form, 0), now)
+
+
+def add_counts(counts, other):
+    for key, count in other.items():
+        counts[key] = counts.get(key, 0) + count
+
+
+def sync_form_stream(stream, client, config, state, catalog, forms_to_sync, responses_forms,
+                     selected_streams, records_count):
+    """
+    Sync a stream for each form and return the number of responses fetched per form.
+    """
+    # Profiled from the thread syncing the stream, which is its own with `stream_workers`
+    with profiling.profile(config, stream):
+        return sync_forms(stream, client, config, state, catalog, forms_to_sync, responses_forms,
+                          selected_streams, records_count)
+
+
+def sync_forms(stream, client, config, state, catalog, forms_to_sync, responses_forms,
+               selected_streams, records_count):
+    stream_obj = STREAMS[stream](config)
+    is_responses_stream = stream_obj.endpoint == preflight.RESPONSES_ENDPOINT
+    if is_responses_stream and config.get('fair_scheduling'):
+        return scheduler.sync_fairly(STREAMS[stream], client, state, catalog['streams'], responses_forms,
+                                     config, selected_streams, records_count)
+
+    responses_fetched = {}
+    for form in forms_to_sync:
+        if is_responses_stream and form not in responses_forms:
+            continue
+        if run_control.should_stop():
+            run_report.skip(stream, form, 'stopped')
+            continue
+
+        with memory.track(stream, form), run_report.track(stream, form):
+            stream_obj.sync_obj(client, state, catalog['streams'], form, config["start_date"],
+                                selected_streams, records_count)
+        if is_responses_stream:
+            responses_fetched[form] = stream_obj.fetched_count
+    return responses_fetched
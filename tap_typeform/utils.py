@@ -1,4 +1,12 @@
 import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 
 def read_config(config_path):
@@ -19,6 +27,35 @@ def write_config(config_path, data):
     """
     config = read_config(config_path)
     config.update(data)
-    with open(config_path, "w") as tap_config:
+    # Replace the file at once, so other processes sharing the config never read a partial file.
+    # The new file keeps the mode of the config, not the private mode of temporary files.
+    config_dir = os.path.dirname(os.path.abspath(config_path))
+    with tempfile.NamedTemporaryFile("w", dir=config_dir, suffix=".tmp", delete=False) as tap_config:
         json.dump(config, tap_config, indent=2)
+    try:
+        os.chmod(tap_config.name, os.stat(config_path).st_mode & 0o7777)
+        os.replace(tap_config.name, config_path)
+    except OSError:
+        # A config mounted as a single file (a bind mount or a secret volume) cannot be replaced,
+        # it is written in place, the token refresh holds the config lock while writing it
+        os.remove(tap_config.name)
+        with open(config_path, "w") as tap_config:
+            json.dump(config, tap_config, indent=2)
     return config
+
+
+@contextmanager
+def config_lock(config_path):
+    """
+    Hold an exclusive lock on the config file, shared by all the processes using it.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    with open(config_path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,33 @@
+import copy
+
+from tap_typeform.schema import get_schemas
+
+
+ANSWERS = [
+    {"field": {"id": "q1", "type": "short_text", "ref": "r1"}, "type": "text", "text": "text1"},
+    {"field": {"id": "q2", "type": "multiple_choice", "ref": "r2"}, "type": "choice", "choice": {"label": "A"}},
+]
+
+
+def get_catalogs():
+    """
+    Return the catalog entries of all the streams.
+    """
+    schemas, field_metadata = get_schemas()
+    return [{"tap_stream_id": stream, "schema": schema, "metadata": field_metadata[stream]}
+            for stream, schema in schemas.items()]
+
+
+def get_response(landing_id, submitted_at, answers=0):
+    """
+    Return a response of the API with the first `answers` answers of `ANSWERS`, copied since
+    the streams flatten the answers in place.
+    """
+    return {
+        "landing_id": landing_id,
+        "token": landing_id,
+        "landed_at": submitted_at,
+        "submitted_at": submitted_at,
+        "metadata": {"user_agent": "mozila", "platform": "other", "referer": "", "network_id": "", "browser": "default"},
+        "answers": copy.deepcopy(ANSWERS[:answers]),
+    }
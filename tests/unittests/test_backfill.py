@@ -0,0 +1,100 @@
+import unittest
+from unittest import mock
+from singer import utils
+from tap_typeform import backfill
+from tap_typeform.state_store import StateStore
+from helpers import get_catalogs, get_response
+
+
+NOW = utils.strptime_to_utc("2022-07-10T00:00:00Z")
+START_DATE = "2022-07-01T00:00:00Z"
+SELECTED_STREAMS = ["submitted_landings"]
+
+
+# Pages of responses of the new form, newest first, by `before` token
+PAGES = {
+    None: [get_response("l6", "2022-07-05T06:00:00Z"), get_response("l5", "2022-07-05T05:00:00Z")],
+    "l5": [get_response("l4", "2022-07-05T04:00:00Z"), get_response("l3", "2022-07-05T03:00:00Z")],
+    "l3": [get_response("l2", "2022-07-05T02:00:00Z"), get_response("l1", "2022-07-05T01:00:00Z")],
+}
+
+
+def get_client():
+    client = mock.Mock(page_size=2, requests=[])
+
+    def request(url, params):
+        client.requests.append(dict(params))
+        tokens = list(PAGES)
+        before = params.get("before")
+        return {"items": PAGES[before], "page_count": len(tokens) - tokens.index(before)}
+
+    client.build_url.side_effect = lambda endpoint: "https://api.typeform.com/" + endpoint
+    client.request.side_effect = request
+    return client
+
+
+@mock.patch("tap_typeform.backfill.state_store._store", new_callable=StateStore)
+class TestBackfillPlan(unittest.TestCase):
+    """
+    Test that the history of new forms and of an earlier start date is moved to the backfill lane.
+    """
+
+    def test_new_form(self, mock_store):
+        state = {"bookmarks": {"submitted_landings": {"form1": {"submitted_at": "2022-07-05T00:00:00Z"}}}}
+        backfill.plan(state, ["form1", "form2"], ["submitted_landings"], SELECTED_STREAMS, START_DATE, NOW)
+
+        # Verify the new form is bookmarked at the start of the run and its history is in the lane
+        self.assertEqual(state["bookmarks"]["submitted_landings"]["form2"], {"submitted_at": "2022-07-10T00:00:00Z"})
+        self.assertEqual(list(state["backfill"]["windows"]["submitted_landings"]), ["form2"])
+        window = state["backfill"]["windows"]["submitted_landings"]["form2"]
+        self.assertEqual(window["until"], 1657411199)
+        self.assertEqual(window["state"]["bookmarks"]["submitted_landings"]["form2"], {"submitted_at": START_DATE})
+
+    def test_start_date_moved_back(self, mock_store):
+        state = {"bookmarks": {"submitted_landings": {"form1": {"submitted_at": "2022-07-05T00:00:00Z"}}},
+                 "backfill": {"start_date": START_DATE, "windows": {}}}
+        backfill.plan(state, ["form1"], ["submitted_landings"], SELECTED_STREAMS, "2022-06-01T00:00:00Z", NOW)
+
+        # Verify only the history before the previous start date is added to the lane
+        window = state["backfill"]["windows"]["submitted_landings"]["form1"]
+        self.assertEqual(window["until"], 1656633599)
+        self.assertEqual(window["state"]["bookmarks"]["submitted_landings"]["form1"],
+                         {"submitted_at": "2022-06-01T00:00:00Z"})
+        self.assertEqual(state["backfill"]["start_date"], "2022-06-01T00:00:00Z")
+        self.assertEqual(state["bookmarks"]["submitted_landings"]["form1"], {"submitted_at": "2022-07-05T00:00:00Z"})
+
+
+@mock.patch("tap_typeform.backfill.state_store._store", new_callable=StateStore)
+@mock.patch("tap_typeform.output.write_record")
+class TestBackfillLane(unittest.TestCase):
+    """
+    Test that the backfill lane works through the history in chunks limited by its budget.
+    """
+
+    catalogs = get_catalogs()
+
+    def sync_lane(self, client, state):
+        return backfill.sync_lane(client, state, self.catalogs, ["form1"],
+                                  {"start_date": START_DATE, "backfill_max_pages": 2},
+                                  SELECTED_STREAMS, {"submitted_landings": 0})
+
+    def test_sync_lane(self, mock_write_record, mock_store):
+        state = {}
+        backfill.plan(state, ["form1"], ["submitted_landings"], SELECTED_STREAMS, START_DATE, NOW)
+
+        client = get_client()
+        self.assertEqual(self.sync_lane(client, state), 2)
+        self.assertEqual([(params.get("before"), params["since"], params["until"]) for params in client.requests],
+                         [(None, 1656633600, 1657411199), ("l5", 1656633600, 1657411199)])
+        self.assertIn("form1", state["backfill"]["windows"]["submitted_landings"])
+
+        # Verify the next run continues from the page checkpoint of the lane and completes the window
+        client = get_client()
+        self.assertEqual(self.sync_lane(client, state), 1)
+        self.assertEqual([params.get("before") for params in client.requests], ["l3"])
+        self.assertEqual(state["backfill"]["windows"], {})
+        self.assertEqual([call.args[1]["landing_id"] for call in mock_write_record.mock_calls],
+                         ["l6", "l5", "l4", "l3", "l2", "l1"])
+
+        # Verify the bookmark of the incremental sync is not moved by the lane
+        self.assertEqual(state["bookmarks"]["submitted_landings"]["form1"], {"submitted_at": "2022-07-10T00:00:00Z"})
@@ -0,0 +1,102 @@
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from tap_typeform import output
+from tap_typeform.batch import BatchWriter
+
+
+class TestBatchWriter(unittest.TestCase):
+    """
+    Test writing records of the batch streams to files.
+    """
+
+    def setUp(self):
+        self.batch_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.batch_dir)
+
+    def read_batch(self, message):
+        path = message["manifest"][0][len("file://"):]
+        with gzip.open(path) as batch_file:
+            return [json.loads(line) for line in batch_file]
+
+    def test_finalize(self):
+        """
+        Test that finalize closes the file and returns a BATCH message pointing to it.
+        """
+        writer = BatchWriter(self.batch_dir)
+        for i in range(3):
+            record = {"landing_id": i}
+            self.assertEqual(writer.write_record("answers", output.format_message(record), record), [])
+
+        messages = writer.finalize()
+
+        # Verify one BATCH message is returned with the expected encoding and records
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0]["type"], "BATCH")
+        self.assertEqual(messages[0]["stream"], "answers")
+        self.assertEqual(messages[0]["encoding"], {"format": "jsonl", "compression": "gzip"})
+        self.assertEqual(self.read_batch(messages[0]), [{"landing_id": 0}, {"landing_id": 1}, {"landing_id": 2}])
+        self.assertFalse(writer.has_open_batches())
+
+    def test_rollover(self):
+        """
+        Test that the files are finalized once they grow beyond the max size.
+        """
+        writer = BatchWriter(self.batch_dir, max_bytes=40)
+        record = {"landing_id": "a" * 20}
+        writer.write_record("submitted_landings", output.format_message(record), record)
+        messages = writer.write_record("submitted_landings", output.format_message(record), record)
+
+        # Verify the file is rolled over after the second record
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(len(self.read_batch(messages[0])), 2)
+
+    def test_invalid_compression(self):
+        """
+        Test that an invalid compression raises an exception.
+        """
+        with self.assertRaises(Exception) as e:
+            BatchWriter(self.batch_dir, compression="bz2")
+
+        self.assertEqual(str(e.exception),
+                         "Invalid compression bz2 for jsonl batches, it should be one of ['gzip', 'zstd'].")
+
+
+class TestBatchOutput(unittest.TestCase):
+    """
+    Test the output layer in batch mode.
+    """
+
+    def setUp(self):
+        self.batch_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.batch_dir)
+
+    def test_state_after_batch(self):
+        """
+        Test that the state is written only after the BATCH message of the open files.
+        """
+        stream = io.BytesIO()
+        with mock.patch("tap_typeform.output._writer", output.MessageWriter(stream=stream)), \
+                mock.patch("tap_typeform.output._batch", BatchWriter(self.batch_dir)):
+            output.write_record("forms", {"id": "form1"})
+            output.write_record("answers", {"landing_id": 1})
+            output.write_state({"bookmarks": {"answers": {}}})
+            output.flush()
+
+            # Verify the state is held back while the batch file is open
+            self.assertEqual([json.loads(line)["type"] for line in stream.getvalue().splitlines()], ["RECORD"])
+
+            output.close()
+
+        messages = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([message["type"] for message in messages], ["RECORD", "BATCH", "STATE"])
+        self.assertEqual(messages[1]["stream"], "answers")
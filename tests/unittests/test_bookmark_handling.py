@@ -124,7 +124,7 @@ class TestWriteBookmark(unittest.TestCase):
 
 @mock.patch("tap_typeform.streams.singer.utils")
 @mock.patch("tap_typeform.streams.singer.metadata")
-@mock.patch("tap_typeform.streams.singer.write_record")
+@mock.patch("tap_typeform.output.write_record")
 class TestWriteRecords(unittest.TestCase):
     """
     Test `write_records` function
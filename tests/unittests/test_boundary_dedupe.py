@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+from tap_typeform.streams import SubmittedLandings, BoundaryIndex, write_bookmarks
+from helpers import get_catalogs, get_response
+
+
+def get_page():
+    return [
+        get_response("l3", "2022-07-05T06:53:30Z", answers=1),
+        get_response("l2", "2022-07-05T06:53:30Z", answers=1),
+        get_response("l1", "2022-07-04T06:53:30Z", answers=1),
+    ]
+
+
+@mock.patch("tap_typeform.state_store.checkpoint")
+class TestBoundaryDedupe(unittest.TestCase):
+    """
+    Test that the landings emitted at the bookmark are not emitted again by the next run.
+    """
+
+    catalogs = get_catalogs()
+
+    def sync(self, state, page, config):
+        client = mock.Mock(page_size=100)
+        client.request.return_value = {"items": page, "page_count": 1}
+        records_count = {"submitted_landings": 0, "answers": 0}
+        with mock.patch("tap_typeform.output.write_record") as mock_write_record:
+            SubmittedLandings(config).sync_obj(client, state, self.catalogs, "form1", "2022-07-01T00:00:00Z",
+                                               ["submitted_landings", "answers"], records_count)
+        return [(call.args[0], call.args[1]["landing_id"]) for call in mock_write_record.mock_calls]
+
+    def test_dedupe_boundary(self, mock_checkpoint):
+        state = {}
+        self.sync(state, get_page(), {})
+
+        # Verify the landings at the bookmark are saved with the bookmark
+        self.assertEqual(state["bookmarks"]["submitted_landings"]["form1"],
+                         {"submitted_at": "2022-07-05T06:53:30Z", "landing_ids": ["l2", "l3"]})
+        self.assertEqual(state["bookmarks"]["answers"]["form1"],
+                         {"submitted_at": "2022-07-05T06:53:30Z", "landing_ids": ["l2", "l3"]})
+
+        # Verify the next run only emits the new landing at the bookmark
+        emitted = self.sync(state, [get_response("l4", "2022-07-05T06:53:30Z", answers=1)] + get_page()[:2], {})
+        self.assertEqual(emitted, [("submitted_landings", "l4"), ("answers", "l4")])
+        self.assertEqual(state["bookmarks"]["submitted_landings"]["form1"]["landing_ids"], ["l2", "l3", "l4"])
+
+    def test_child_lagging(self, mock_checkpoint):
+        """
+        Test that a landing fetched again for the lagging child is not emitted again for the parent.
+        """
+        state = {"bookmarks": {
+            "submitted_landings": {"form1": {"submitted_at": "2022-07-05T06:53:30Z", "landing_ids": ["l2", "l3"]}},
+            "answers": {"form1": {"submitted_at": "2022-07-04T00:00:00Z"}},
+        }}
+        emitted = self.sync(state, get_page(), {})
+
+        self.assertEqual(emitted, [("answers", "l3"), ("answers", "l2"), ("answers", "l1")])
+
+
+class TestBoundaryIndex(unittest.TestCase):
+    """
+    Test `BoundaryIndex` methods.
+    """
+
+    def test_add(self):
+        boundary = BoundaryIndex("2022-07-04T00:00:00Z", ["l1"])
+        boundary.add("2022-07-05T00:00:00Z", "l2")
+        boundary.add("2022-07-03T00:00:00Z", "l3")
+        boundary.add("2022-07-05T00:00:00Z", "l4")
+
+        self.assertEqual(boundary.landing_ids_at("2022-07-05T00:00:00Z"), ["l2", "l4"])
+        self.assertEqual(boundary.landing_ids_at("2022-07-06T00:00:00Z"), [])
+
+    def test_unchanged_bookmark_keeps_ids(self):
+        """
+        Test the saved ids are kept when the bookmark did not move.
+        """
+        state = {"bookmarks": {"unsubmitted_landings": {"form1": {"landed_at": "2022-07-05T06:53:30Z", "landing_ids": ["l1"]}}}}
+        write_bookmarks("unsubmitted_landings", ["unsubmitted_landings"], "form1", "2022-07-05T06:53:30Z", state)
+
+        self.assertEqual(state["bookmarks"]["unsubmitted_landings"]["form1"]["landing_ids"], ["l1"])
@@ -1,6 +1,7 @@
 import unittest
 from unittest import mock
 from tap_typeform.discover import discover
+from tap_typeform.schema import get_schemas, read_schema_files
 from singer.catalog import Catalog
 
 
@@ -22,3 +23,34 @@ class TestDiscover(unittest.TestCase):
 
         # Verify logger called 3 times when an exception arises.
         self.assertEqual(mock_logger.call_count, 3)
+
+
+class TestSchemaCache(unittest.TestCase):
+    """Test the schemas are built once per process and schema files."""
+
+    def test_cached_schemas(self):
+        schemas, field_metadata = get_schemas()
+
+        with mock.patch("tap_typeform.schema.build_schemas") as mock_build:
+            self.assertEqual(get_schemas(), (schemas, field_metadata))
+        self.assertFalse(mock_build.called)
+
+    def test_modified_schemas(self):
+        schemas, field_metadata = get_schemas()
+        schemas["forms"]["properties"].clear()
+        field_metadata["forms"].clear()
+
+        # Verify the changes of a caller do not reach the cached schemas
+        schemas, field_metadata = get_schemas()
+        self.assertTrue(schemas["forms"]["properties"])
+        self.assertTrue(field_metadata["forms"])
+
+    def test_changed_schema_files(self):
+        contents, schemas_hash = read_schema_files()
+        contents["forms"] = contents["forms"].replace(b'"properties"', b'"properties" ', 1)
+
+        # Verify the schemas are built again when the schema files change
+        with mock.patch("tap_typeform.schema.read_schema_files", return_value=(contents, "changed")):
+            schemas, _ = get_schemas()
+        self.assertIsNot(schemas, get_schemas()[0])
+        self.assertEqual(schemas, get_schemas()[0])
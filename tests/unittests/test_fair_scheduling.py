@@ -0,0 +1,82 @@
+import unittest
+from unittest import mock
+from tap_typeform.scheduler import sync_fairly
+from tap_typeform.state_store import StateStore
+from tap_typeform.streams import SubmittedLandings
+from helpers import get_catalogs, get_response
+
+
+START_DATE = "2022-07-01T00:00:00Z"
+
+
+# Pages of responses of each form, newest first, by `before` token
+PAGES = {
+    "big": {
+        None: [get_response("b6", "2022-07-05T06:00:00Z"), get_response("b5", "2022-07-05T05:00:00Z")],
+        "b5": [get_response("b4", "2022-07-05T04:00:00Z"), get_response("b3", "2022-07-05T03:00:00Z")],
+        "b3": [get_response("b2", "2022-07-05T02:00:00Z"), get_response("b1", "2022-07-05T01:00:00Z")],
+    },
+    "small": {
+        None: [get_response("s1", "2022-07-05T01:00:00Z")],
+    },
+}
+
+
+def request(requests, url, params):
+    requests.append((url.split("/")[-2], params.get("before")))
+    pages = PAGES[url.split("/")[-2]]
+    tokens = list(pages)
+    before = params.get("before")
+    return {"items": pages[before], "page_count": len(tokens) - tokens.index(before)}
+
+
+def get_client():
+    client = mock.Mock(page_size=2, requests=[])
+    client.build_url.side_effect = lambda endpoint: "https://api.typeform.com/" + endpoint
+    client.request.side_effect = lambda url, params: request(client.requests, url, params)
+    return client
+
+
+@mock.patch("tap_typeform.state_store._store", new_callable=StateStore)
+@mock.patch("tap_typeform.output.write_record")
+class TestFairScheduling(unittest.TestCase):
+    """
+    Test that the pages of the forms are interleaved and limited by the page budget.
+    """
+
+    catalogs = get_catalogs()
+
+    def sync(self, client, state, forms, config):
+        return sync_fairly(SubmittedLandings, client, state, self.catalogs, forms, {"start_date": START_DATE, **config},
+                           ["submitted_landings"], {"submitted_landings": 0})
+
+    def test_interleave_pages(self, mock_write_record, mock_store):
+        client = get_client()
+        state = {}
+        fetched = self.sync(client, state, ["big", "small"], {})
+
+        # Verify the small form is synced after the first page of the big form instead of after all of them
+        self.assertEqual(client.requests, [("big", None), ("small", None), ("big", "b5"), ("big", "b3")])
+        self.assertEqual(fetched, {"big": 6, "small": 1})
+        self.assertEqual(state["bookmarks"]["submitted_landings"]["big"]["submitted_at"], "2022-07-05T06:00:00Z")
+
+    def test_page_budget(self, mock_write_record, mock_store):
+        client = get_client()
+        state = {}
+        self.sync(client, state, ["big"], {"form_page_budget": 2})
+
+        # Verify the bookmark does not move before the oldest page is synced
+        self.assertNotIn("bookmarks", state)
+        self.assertEqual(state["page_checkpoints"]["submitted_landings"]["big"],
+                         {"before": "b3", "max_bookmark": "2022-07-05T06:00:00Z",
+                          "boundaries": {"submitted_landings": ["b6"]}})
+
+        # Verify the next run resumes from the page checkpoint and then writes the bookmark
+        client = get_client()
+        self.sync(client, state, ["big"], {"form_page_budget": 2})
+        self.assertEqual(client.requests, [("big", "b3")])
+        self.assertEqual(state["page_checkpoints"]["submitted_landings"], {})
+        self.assertEqual(state["bookmarks"]["submitted_landings"]["big"],
+                         {"submitted_at": "2022-07-05T06:00:00Z", "landing_ids": ["b6"]})
+        self.assertEqual([call.args[1]["landing_id"] for call in mock_write_record.mock_calls],
+                         ["b6", "b5", "b4", "b3", "b2", "b1"])
@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from tap_typeform.streams import Forms
+
+
+def get_client(page_count, wait=None):
+    client = mock.Mock(form_page_size=200, pages=[])
+    client.build_url.side_effect = lambda endpoint: "https://api.typeform.com/" + endpoint
+
+    def request(url, params):
+        page = params["page"]
+        client.pages.append(page)
+        if wait and page > 1:
+            wait(page)
+        return {"items": [{"id": "form{}".format(page)}], "page_count": page_count}
+
+    client.request.side_effect = request
+    return client
+
+
+class TestFormsPages(unittest.TestCase):
+    """
+    Test that the pages of forms after the first one are fetched concurrently and yielded in order.
+    """
+
+    def test_concurrent_pages(self):
+        # Every page after the first waits for the others, which only passes if they are fetched concurrently
+        barrier = threading.Barrier(3, timeout=5)
+        client = get_client(4, lambda page: barrier.wait())
+        pages = list(Forms({"forms_page_workers": 3}).get_forms(client))
+
+        self.assertEqual(pages, [[{"id": "form{}".format(page)}] for page in range(1, 5)])
+
+    def test_pages_in_order(self):
+        # The first pages are the slowest to return
+        client = get_client(5, lambda page: time.sleep((5 - page) * 0.02))
+        pages = list(Forms({"forms_page_workers": 4}).get_forms(client))
+
+        self.assertEqual(pages, [[{"id": "form{}".format(page)}] for page in range(1, 6)])
+
+    def test_sequential_pages(self):
+        client = get_client(3)
+        pages = list(Forms({"forms_page_workers": 1}).get_forms(client))
+
+        self.assertEqual(client.pages, [1, 2, 3])
+        self.assertEqual(len(pages), 3)
+
+    @mock.patch("tap_typeform.streams.ThreadPoolExecutor")
+    def test_sequential_by_default(self, mock_executor):
+        client = get_client(3)
+        pages = list(Forms().get_forms(client))
+
+        mock_executor.assert_not_called()
+        self.assertEqual(client.pages, [1, 2, 3])
+        self.assertEqual(len(pages), 3)
+
+    def test_single_page(self):
+        client = get_client(1)
+        self.assertEqual(list(Forms().get_forms(client)), [[{"id": "form1"}]])
+        self.assertEqual(client.pages, [1])
+
+    def test_stop_early(self):
+        client = get_client(50, lambda page: time.sleep(0.01))
+        for page in Forms({"forms_page_workers": 2}).get_forms(client):
+            break
+
+        # Verify the pages not fetched yet are dropped
+        self.assertLess(len(client.pages), 50)
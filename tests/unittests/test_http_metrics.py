@@ -0,0 +1,89 @@
+import unittest
+from unittest import mock
+from parameterized import parameterized
+
+import requests
+from tap_typeform import http_metrics
+from tap_typeform.client import Client, TypeformTooManyError
+from tap_typeform.sync import sync
+
+
+def get_mock_http_response(status_code, contents='{"items": [], "total_items": 0}'):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = contents.encode()
+    return response
+
+
+class TestEndpoint(unittest.TestCase):
+    """
+    Test that the requests are tagged by endpoint and form.
+    """
+
+    @parameterized.expand([
+        ["responses", "https://api.typeform.com/forms/form1/responses", ("forms/{}/responses", "form1")],
+        ["form", "https://api.typeform.com/forms/form1", ("forms/{}", "form1")],
+        ["forms", "https://api.typeform.com/forms", ("forms", None)],
+        ["path", "forms/form1/responses", ("forms/{}/responses", "form1")],
+    ])
+    def test_get_endpoint(self, name, url, expected):
+        self.assertEqual(http_metrics.get_endpoint(url), expected)
+
+    def test_percentile(self):
+        values = [0.1 * number for number in range(1, 101)]
+        self.assertAlmostEqual(http_metrics.percentile(values, 50), 5.0)
+        self.assertAlmostEqual(http_metrics.percentile(values, 99), 9.9)
+        self.assertEqual(http_metrics.percentile([], 50), 0)
+
+
+@mock.patch("time.sleep")
+@mock.patch("tap_typeform.client.requests.Session.get")
+class TestRequestMetrics(unittest.TestCase):
+    """
+    Test that the metrics of every request are recorded.
+    """
+
+    def setUp(self):
+        http_metrics.reset()
+        self.client = Client({"token": "token"}, "", False)
+
+    def test_request_metrics(self, mock_get, mock_sleep):
+        mock_get.return_value = get_mock_http_response(200)
+        with mock.patch.object(requests.Response, "json", autospec=True, side_effect=requests.Response.json) as mock_json:
+            self.assertEqual(self.client.request("https://api.typeform.com/forms/form1/responses"),
+                             {"items": [], "total_items": 0})
+
+        # Verify the response is decoded once
+        self.assertEqual(mock_json.call_count, 1)
+        summary, = http_metrics.log_summary()
+        self.assertEqual(summary["endpoint"], "forms/{}/responses")
+        self.assertEqual((summary["requests"], summary["forms"], summary["bytes"]), (1, 1, 31))
+        self.assertEqual(summary["status_codes"], {200: 1})
+
+    def test_backoff_metrics(self, mock_get, mock_sleep):
+        mock_get.side_effect = [get_mock_http_response(429, "{}"), get_mock_http_response(200)]
+        self.client.request("https://api.typeform.com/forms/form1/responses")
+
+        summary, = http_metrics.log_summary()
+        self.assertEqual(summary["status_codes"], {429: 1, 200: 1})
+        self.assertEqual((summary["rate_limited"], summary["backoffs"]), (1, 1))
+
+    def test_failed_request(self, mock_get, mock_sleep):
+        mock_get.return_value = get_mock_http_response(429, "{}")
+        with self.assertRaises(TypeformTooManyError):
+            self.client.request("https://api.typeform.com/forms")
+
+        # Verify the last failure is not followed by a backoff
+        summary, = http_metrics.log_summary()
+        self.assertEqual((summary["requests"], summary["rate_limited"], summary["backoffs"]), (3, 3, 2))
+
+    @mock.patch("tap_typeform.sync.sync_streams")
+    def test_sync_resets_metrics(self, mock_sync_streams, mock_get, mock_sleep):
+        mock_get.return_value = get_mock_http_response(200)
+        self.client.request("https://api.typeform.com/forms/form1/responses")
+        mock_sync_streams.side_effect = lambda *args: self.client.request("https://api.typeform.com/forms")
+        sync(self.client, {"start_date": "2022-07-01T00:00:00Z"}, {}, {"streams": []}, [])
+
+        # Verify only the requests of the last sync are summarized
+        summary, = http_metrics.log_summary()
+        self.assertEqual((summary["endpoint"], summary["requests"]), ("forms", 1))
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+import unittest
+
+
+# Modules only the sync needs, importing them slows down every discover
+SYNC_MODULES = ["pendulum", "tap_typeform.sync", "tap_typeform.client", "tap_typeform.planner",
+                "concurrent.futures.process", "tap_typeform.output", "tap_typeform.batch", "orjson",
+                "tap_typeform.state_store", "sqlite3", "tap_typeform.memory", "tracemalloc",
+                "tap_typeform.pipeline", "tap_typeform.progress", "tap_typeform.run_control",
+                "tap_typeform.run_report", "tap_typeform.phase_timers", "tap_typeform.profiling", "cProfile",
+                "tap_typeform.shard"]
+# Import time allowed to the modules of the tap, on top of singer and its dependencies
+MAX_TAP_IMPORT_SECONDS = 0.5
+
+
+def get_import_times(code):
+    """
+    Return the import time in seconds of each module imported by the code, from `-X importtime`.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_time, _, module = line[len("import time:"):].split("|")
+            if self_time.strip().isdigit():
+                import_times[module.strip()] = int(self_time) / 1000000
+    return import_times
+
+
+class TestImportTime(unittest.TestCase):
+    """
+    Test that discover does not import the sync modules, and measure the import time of the tap.
+    """
+
+    def test_discover_imports(self):
+        import_times = get_import_times("import tap_typeform; tap_typeform._discover()")
+
+        self.assertIn("tap_typeform.discover", import_times)
+        for module in SYNC_MODULES:
+            self.assertNotIn(module, import_times)
+
+        tap_seconds = sum(seconds for module, seconds in import_times.items() if module.startswith("tap_typeform"))
+        self.assertLess(tap_seconds, MAX_TAP_IMPORT_SECONDS)
@@ -40,6 +40,18 @@ class TestMainWorkflow(unittest.TestCase):
         self.assertTrue(mock_discover.called)
         self.assertFalse(mock_sync.called)
 
+    @mock.patch("tap_typeform.client.Client")
+    def test_discover_offline(self, mock_client, mock_sync, mock_discover, mock_args, mock_validate):
+        """
+        Test discover mode does not create the client or request the forms.
+        """
+        mock_args.return_value = MockArgs(discover=True, config=self.mock_config)
+        main()
+
+        self.assertTrue(mock_discover.called)
+        self.assertFalse(mock_client.called)
+        self.assertFalse(mock_validate.called)
+
     def test_sync_with_catalog(self, mock_sync, mock_discover, mock_args, mock_validate):
         """
         Test sync mode with catalog given in args.
@@ -108,6 +120,33 @@ class TestMainWorkflow(unittest.TestCase):
         self.assertFalse(mock_discover.called)
         self.assertTrue(mock_sync.called)
 
+    @mock.patch("tap_typeform.planner.print_plan")
+    def test_plan_mode(self, mock_print_plan, mock_sync, mock_discover, mock_args, mock_validate):
+        """
+        Test the plan mode plans the sync in place of syncing.
+        """
+        config = {**self.mock_config, "plan": True}
+        mock_args.return_value = MockArgs(config=config, catalog=Catalog.from_dict(self.mock_catalog))
+        main()
+
+        mock_print_plan.assert_called_with(mock.ANY, config, {}, self.mock_catalog, mock_validate.return_value)
+        self.assertFalse(mock_sync.called)
+
+    @mock.patch("tap_typeform.planner.print_plan")
+    def test_plan_arg(self, mock_print_plan, mock_sync, mock_discover, mock_args, mock_validate):
+        """
+        Test `--plan` is removed from the arguments before parsing them and turns on the plan mode.
+        """
+        config = dict(self.mock_config)
+        mock_args.return_value = MockArgs(config=config, catalog=Catalog.from_dict(self.mock_catalog))
+        with mock.patch("sys.argv", ["tap-typeform", "--plan", "--config", "config.json"]) as argv:
+            main()
+            self.assertEqual(argv, ["tap-typeform", "--config", "config.json"])
+
+        self.assertTrue(config["plan"])
+        self.assertTrue(mock_print_plan.called)
+        self.assertFalse(mock_sync.called)
+
 
 @mock.patch("tap_typeform.Forms")
 class TestValidateFormIds(unittest.TestCase):
@@ -0,0 +1,68 @@
+import tracemalloc
+import unittest
+from unittest import mock
+
+from tap_typeform import memory
+
+
+class TestMemoryTracking(unittest.TestCase):
+    """
+    Test that the peak memory is tracked per stream and form.
+    """
+
+    def tearDown(self):
+        memory.configure({})
+
+    def test_disabled(self):
+        memory.configure({})
+        with memory.track("submitted_landings", "form1"):
+            pass
+        self.assertIsNone(memory.get_tracker())
+        self.assertIsNone(memory.log_summary())
+
+    def test_peaks(self):
+        memory.configure({"memory_tracking": True})
+        with memory.track("submitted_landings", "form1"):
+            with memory.track("submitted_landings", "form1", page=True):
+                records = [{"landing_id": str(number)} for number in range(20000)]
+            del records
+        with memory.track("submitted_landings", "form2"):
+            pass
+
+        summary = memory.log_summary()
+        forms = {form["form_id"]: form for form in summary["forms"]}
+        # Verify the form allocating the page is the heaviest, with the site allocating the records
+        self.assertEqual(summary["forms"][0]["form_id"], "form1")
+        self.assertGreater(forms["form1"]["peak_bytes"], forms["form2"]["peak_bytes"] + 1024 * 1024)
+        self.assertEqual(summary["streams"]["submitted_landings"]["peak_bytes"], forms["form1"]["peak_bytes"])
+        self.assertGreater(summary["streams"]["submitted_landings"]["page_peak_bytes"], 1024 * 1024)
+        self.assertEqual(summary["largest_allocation"]["form_id"], "form1")
+        self.assertTrue(summary["largest_allocation"]["sites"][0]["site"].startswith(__file__))
+
+        # Verify tracing stops with the summary
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIsNone(memory.get_tracker())
+
+    @mock.patch("tap_typeform.memory.get_rss", return_value=300 * memory.MB)
+    @mock.patch("tap_typeform.memory.LOGGER.warning")
+    def test_warning_threshold(self, mock_warning, mock_rss):
+        memory.configure({"memory_tracking": True, "memory_warning_mb": 256})
+        for _ in range(2):
+            with memory.track("submitted_landings", "form1", page=True):
+                pass
+
+        # Verify the threshold is reported once per form
+        self.assertEqual(mock_warning.call_count, 1)
+        self.assertEqual(mock_warning.call_args.args[1:3], ("submitted_landings", "form1"))
+
+    @mock.patch("tap_typeform.memory.get_rss", return_value=100 * memory.MB)
+    @mock.patch("tap_typeform.memory.LOGGER.warning")
+    def test_below_threshold(self, mock_warning, mock_rss):
+        memory.configure({"memory_tracking": True, "memory_warning_mb": 256})
+        with memory.track("submitted_landings", "form1"):
+            pass
+        mock_warning.assert_not_called()
+
+    def test_rss(self):
+        self.assertGreater(memory.get_rss(), 0)
+        self.assertGreater(memory.get_peak_rss(), 0)
@@ -0,0 +1,160 @@
+import io
+import json
+import unittest
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+import singer
+from tap_typeform import output
+
+
+class TestFormatMessage(unittest.TestCase):
+    """
+    Test that messages serialized by the output layer match singer's messages.
+    """
+
+    def test_record_matches_singer(self):
+        """
+        Test the record message decodes to the same document as singer's message.
+        """
+        time_extracted = datetime(2022, 7, 5, 6, 53, 30, tzinfo=timezone.utc)
+        record = {"landing_id": "abc", "answer": "ünïcode", "number": 10}
+        stream = io.BytesIO()
+        writer = output.MessageWriter(stream=stream)
+
+        with mock.patch("tap_typeform.output._writer", writer):
+            output.write_record("answers", record, time_extracted=time_extracted)
+            output.flush()
+
+        expected = singer.format_message(singer.RecordMessage("answers", record, time_extracted=time_extracted))
+
+        # Verify the written line is newline terminated and equal to singer's message
+        self.assertTrue(stream.getvalue().endswith(b"\n"))
+        self.assertEqual(json.loads(stream.getvalue()), json.loads(expected))
+
+    def test_decimal_fallback(self):
+        """
+        Test that `Decimal` values are serialized without losing precision.
+        """
+        line = output.format_message({"type": "RECORD", "stream": "answers", "record": {"value": Decimal("1.10")}})
+
+        # Verify the decimal value is written as it is
+        self.assertIn(b'"value": 1.10', line)
+
+
+class TestMessageWriter(unittest.TestCase):
+    """
+    Test buffering and flushing of `MessageWriter`.
+    """
+
+    def test_buffers_records(self):
+        """
+        Test that records are kept in the buffer until a flush is due.
+        """
+        stream = io.BytesIO()
+        writer = output.MessageWriter(stream=stream)
+        writer.write_message({"type": "RECORD", "stream": "forms", "record": {"id": 1}})
+
+        # Verify nothing is written before the flush
+        self.assertEqual(stream.getvalue(), b"")
+
+        writer.flush()
+        self.assertEqual(json.loads(stream.getvalue())["record"], {"id": 1})
+
+    def test_flush_on_state(self):
+        """
+        Test that the state message flushes the buffered records.
+        """
+        stream = io.BytesIO()
+        writer = output.MessageWriter(stream=stream)
+        writer.write_message({"type": "RECORD", "stream": "forms", "record": {"id": 1}})
+        writer.write_message({"type": "STATE", "value": {"bookmarks": {}}})
+
+        lines = stream.getvalue().splitlines()
+        # Verify the record and the state are written in order
+        self.assertEqual([json.loads(line)["type"] for line in lines], ["RECORD", "STATE"])
+
+    def test_flush_on_buffer_size(self):
+        """
+        Test that the buffer is flushed when it grows beyond the buffer size.
+        """
+        stream = io.BytesIO()
+        writer = output.MessageWriter(buffer_size=100, stream=stream)
+        for i in range(10):
+            writer.write_message({"type": "RECORD", "stream": "forms", "record": {"id": i}})
+
+        # Verify that some of the records are written without an explicit flush
+        self.assertGreater(len(stream.getvalue()), 0)
+        self.assertLess(writer.buffered_bytes, 100)
+
+    @mock.patch("tap_typeform.output.time.monotonic")
+    def test_flush_on_interval(self, mock_monotonic):
+        """
+        Test that the buffer is flushed when the flush interval has passed.
+        """
+        mock_monotonic.side_effect = [0, 1, 10, 10]
+        stream = io.BytesIO()
+        writer = output.MessageWriter(flush_interval=5, stream=stream)
+        writer.write_message({"type": "RECORD", "stream": "forms", "record": {"id": 1}})
+        self.assertEqual(stream.getvalue(), b"")
+
+        writer.write_message({"type": "RECORD", "stream": "forms", "record": {"id": 2}})
+        # Verify both records are written once the interval has passed
+        self.assertEqual(len(stream.getvalue().splitlines()), 2)
+
+    def test_configure(self):
+        """
+        Test that the writer is built from the config values.
+        """
+        with mock.patch("tap_typeform.output._writer", output.MessageWriter()):
+            writer = output.configure({"output_buffer_size": "2048", "output_flush_interval": 0})
+
+        self.assertEqual(writer.buffer_size, 2048)
+        self.assertEqual(writer.flush_interval, output.OUTPUT_FLUSH_INTERVAL)
+
+
+class TestThreadedMessageWriter(unittest.TestCase):
+    """
+    Test the background writer thread.
+    """
+
+    def test_writes_in_order(self):
+        """
+        Test that the state is written after all the records queued before it.
+        """
+        stream = io.BytesIO()
+        writer = output.ThreadedMessageWriter(buffer_size=50, queue_size=2, stream=stream)
+        for i in range(20):
+            writer.write_message({"type": "RECORD", "stream": "forms", "record": {"id": i}})
+        writer.write_message({"type": "STATE", "value": {"bookmarks": {}}})
+        writer.close()
+
+        messages = [json.loads(line) for line in stream.getvalue().splitlines()]
+        # Verify all the records are written in order followed by the state
+        self.assertEqual([message["record"]["id"] for message in messages[:-1]], list(range(20)))
+        self.assertEqual(messages[-1]["type"], "STATE")
+        self.assertLessEqual(writer.max_queue_depth, 2)
+
+    def test_writer_error_is_raised(self):
+        """
+        Test that an error in the writer thread is raised in the producer.
+        """
+        stream = mock.Mock()
+        stream.write.side_effect = BrokenPipeError()
+        writer = output.ThreadedMessageWriter(stream=stream)
+        writer.write_message({"type": "STATE", "value": {}})
+
+        with self.assertRaises(BrokenPipeError):
+            writer.close()
+
+    def test_configure_threaded(self):
+        """
+        Test that `output_mode` threaded builds the threaded writer.
+        """
+        with mock.patch("tap_typeform.output._writer", output.MessageWriter()):
+            writer = output.configure({"output_mode": "threaded", "output_queue_size": 4})
+            writer.close()
+
+        self.assertIsInstance(writer, output.ThreadedMessageWriter)
+        self.assertEqual(writer.queue.maxsize, 4)
@@ -0,0 +1,105 @@
+import json
+import unittest
+from unittest import mock
+
+import requests
+from tap_typeform import phase_timers
+from tap_typeform.client import Client
+from tap_typeform.streams import SubmittedLandings
+from helpers import get_catalogs, get_response
+
+
+class TestPhaseTimers(unittest.TestCase):
+    """
+    Test that the phase timings are summed per stream and form.
+    """
+
+    def setUp(self):
+        phase_timers.reset()
+
+    def test_summary(self):
+        phase_timers.add("answers", "form1", "transform", 1.0)
+        phase_timers.add("answers", "form2", "transform", 2.0)
+        phase_timers.add_phases("answers", "form1", {"transform": 0.5, "emit": 1.0})
+        phase_timers.add("forms", None, "fetch", 3.0)
+
+        summary = phase_timers.get_timers().summary()
+        self.assertEqual(summary["answers"]["phases"], {"emit": 1.0, "transform": 3.5})
+        self.assertEqual(summary["answers"]["forms"], {"form1": {"emit": 1.0, "transform": 1.5},
+                                                       "form2": {"transform": 2.0}})
+        self.assertEqual(summary["forms"], {"phases": {"fetch": 3.0}, "forms": {}})
+
+    def test_context(self):
+        # Without a context the seconds are not attributed to any stream
+        phase_timers.add_current("fetch", 1.0)
+        with phase_timers.context("answers", "form1"):
+            with phase_timers.context("forms", None):
+                phase_timers.add_current("fetch", 2.0)
+            phase_timers.add_current("fetch", 1.0)
+
+        self.assertEqual(phase_timers.get_timers().pop(), {("forms", None, "fetch"): 2.0,
+                                                           ("answers", "form1", "fetch"): 1.0})
+        self.assertEqual(phase_timers.get_timers().pop(), {})
+
+    def test_merge(self):
+        phase_timers.add("answers", "form1", "emit", 1.0)
+        phase_timers.get_timers().merge({("answers", "form1", "emit"): 2.0})
+        self.assertEqual(phase_timers.get_timers().pop(), {("answers", "form1", "emit"): 3.0})
+
+    @mock.patch("tap_typeform.phase_timers.LOGGER.info")
+    def test_log_summary(self, mock_info):
+        phase_timers.add("answers", "form1", "emit", 1.0)
+        phase_timers.add("answers", "form2", "emit", 2.0)
+        phase_timers.log_summary()
+
+        # Verify only the timings of the stream are logged by default
+        metrics = [json.loads(call.args[1]) for call in mock_info.call_args_list if call.args[0] == "METRIC: %s"]
+        self.assertEqual(metrics, [{"type": "timer", "metric": "sync_phase_duration", "value": 3.0,
+                                    "tags": {"stream": "answers", "phase": "emit"}}])
+        self.assertEqual(mock_info.call_args_list[-1].args,
+                         ("Phase timings: %s", '{"answers": {"phases": {"emit": 3.0}}}'))
+
+    @mock.patch("tap_typeform.phase_timers.LOGGER.info")
+    def test_log_summary_per_form(self, mock_info):
+        phase_timers.add("answers", "form1", "emit", 1.0)
+        phase_timers.log_summary(per_form=True)
+
+        metrics = [json.loads(call.args[1]) for call in mock_info.call_args_list if call.args[0] == "METRIC: %s"]
+        self.assertEqual(metrics, [
+            {"type": "timer", "metric": "sync_phase_duration", "value": 1.0,
+             "tags": {"stream": "answers", "phase": "emit"}},
+            {"type": "timer", "metric": "sync_phase_duration", "value": 1.0,
+             "tags": {"stream": "answers", "form_id": "form1", "phase": "emit"}},
+        ])
+        self.assertEqual(mock_info.call_args_list[-1].args[0], "Phase timings: %s")
+
+
+@mock.patch("tap_typeform.output.write_record")
+class TestStreamPhases(unittest.TestCase):
+    """
+    Test that the phases of the sync of a page are timed.
+    """
+
+    catalogs = get_catalogs()
+
+    def setUp(self):
+        phase_timers.reset()
+
+    @mock.patch("tap_typeform.client.requests.Session.get")
+    def test_page_phases(self, mock_get, mock_write_record):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({"items": [get_response("l1", "2022-07-05T06:53:30Z", answers=1),
+                                                 get_response("l2", "2022-07-04T06:53:30Z", answers=1)],
+                                       "page_count": 1}).encode()
+        mock_get.return_value = response
+
+        test_stream = SubmittedLandings()
+        test_stream.start_form(Client({"token": "token"}, "", False), {}, self.catalogs, "form1",
+                               "2022-07-01T00:00:00Z", ["submitted_landings", "answers"], {"submitted_landings": 0, "answers": 0})
+        test_stream.sync_page()
+
+        summary = phase_timers.get_timers().summary()
+        self.assertEqual(set(summary["submitted_landings"]["forms"]["form1"]),
+                         {"fetch", "decode", "flatten", "transform", "emit"})
+        self.assertEqual(set(summary["answers"]["forms"]["form1"]), {"flatten", "transform", "emit"})
@@ -0,0 +1,68 @@
+import io
+import json
+import unittest
+from unittest import mock
+from tap_typeform import output, pipeline
+from tap_typeform.streams import SubmittedLandings
+from helpers import get_catalogs, get_response
+
+
+def get_pages():
+    return [
+        {"items": [get_response("l{}".format(i), "2022-07-0{}T06:53:30Z".format(i), answers=2) for i in range(9, 5, -1)], "page_count": 3},
+        {"items": [get_response("l{}".format(i), "2022-07-0{}T06:53:30Z".format(i), answers=2) for i in range(5, 2, -1)], "page_count": 2},
+        {"items": [get_response("l{}".format(i), "2022-07-0{}T06:53:30Z".format(i), answers=2) for i in range(2, 0, -1)], "page_count": 1},
+    ]
+
+
+class TestPagePipeline(unittest.TestCase):
+    """
+    Test that the transform workers write the same output as the in process transform.
+    """
+
+    catalogs = get_catalogs()
+
+    def sync(self, config):
+        state = {"bookmarks": {"answers": {"form1": {"submitted_at": "2022-07-04T00:00:00Z"}}}}
+        records_count = {"submitted_landings": 0, "answers": 0}
+        stream = io.BytesIO()
+        client = mock.Mock(page_size=4)
+        client.request.side_effect = get_pages()
+
+        pipeline.start(config)
+        try:
+            with mock.patch("tap_typeform.output._writer", output.MessageWriter(stream=stream)):
+                SubmittedLandings(config).sync_obj(client, state, self.catalogs, "form1", "2022-07-02T00:00:00Z",
+                                                   ["submitted_landings", "answers"], records_count)
+        finally:
+            pipeline.shutdown()
+
+        messages = [json.loads(line) for line in stream.getvalue().splitlines()]
+        for message in messages:
+            message.pop("time_extracted", None)
+        return messages, state, records_count
+
+    def test_equal_output(self):
+        """
+        Test the messages, state and counts are the same with and without the workers.
+        """
+        expected_messages, expected_state, expected_count = self.sync({})
+        messages, state, records_count = self.sync({"transform_workers": 2})
+
+        # Verify that the records are written in the same order followed by the same state
+        self.assertEqual(messages, expected_messages)
+        self.assertEqual(state, expected_state)
+        self.assertEqual(records_count, expected_count)
+        self.assertEqual(records_count["submitted_landings"], 8)
+
+    def test_batch_mode_disables_workers(self):
+        """
+        Test that pages are transformed in process in batch mode.
+        """
+        pipeline.start({"transform_workers": 2})
+        try:
+            with mock.patch("tap_typeform.output._batch", mock.Mock()):
+                self.assertFalse(pipeline.enabled())
+            self.assertTrue(pipeline.enabled())
+        finally:
+            pipeline.shutdown()
@@ -0,0 +1,62 @@
+import unittest
+from unittest import mock
+
+from tap_typeform import planner
+
+
+START_DATE = "2022-07-01T00:00:00Z"
+STATE = {"bookmarks": {"submitted_landings": {"form1": {"submitted_at": "2022-07-05T06:53:30Z"}},
+                       "answers": {"form1": {"submitted_at": "2022-07-04T06:53:30Z"}}}}
+
+
+def get_catalog(selected_streams):
+    return {"streams": [{"tap_stream_id": stream, "metadata": [{"breadcrumb": [], "metadata": {"selected": True}}]}
+                        for stream in selected_streams]}
+
+
+def get_client(total_items):
+    client = mock.Mock()
+    client.page_size = 1000
+    client.form_page_size = 200
+    client.build_url.side_effect = lambda endpoint: "https://api.typeform.com/" + endpoint
+    client.request.side_effect = lambda url, params: {"total_items": total_items[url.split("/")[-2]], "items": []}
+    return client
+
+
+class TestPlanner(unittest.TestCase):
+    """
+    Test that the sync is planned from count requests without syncing it.
+    """
+
+    @mock.patch("tap_typeform.planner.time.monotonic", side_effect=[0, 0.5, 0, 0.5])
+    def test_plan(self, mock_monotonic):
+        client = get_client({"form1": 2500, "form2": 0})
+        sync_plan = planner.plan(client, {"start_date": START_DATE}, STATE,
+                                 get_catalog(["questions", "submitted_landings", "answers"]), ["form1", "form2"])
+
+        # Verify the responses are counted from the minimum bookmark of the stream and its children
+        client.request.assert_any_call("https://api.typeform.com/forms/form1/responses",
+                                       {"page_size": 1, "since": 1656917610, "completed": True})
+        self.assertEqual(sync_plan["count_requests"], 2)
+        self.assertEqual(sync_plan["streams"], {
+            "submitted_landings": {"forms": 2, "requests": 4, "records": 2500, "seconds": 2.0},
+            "questions": {"forms": 2, "requests": 2, "records": 0, "seconds": 1.0},
+        })
+        self.assertEqual((sync_plan["requests"], sync_plan["records"], sync_plan["seconds"]), (6, 2500, 3.0))
+        self.assertEqual(sync_plan["form_plans"][0], {"stream": "submitted_landings", "form_id": "form1",
+                                                      "since": "2022-07-04T06:53:30Z", "records": 2500,
+                                                      "requests": 3, "seconds": 1.5})
+
+    @mock.patch("tap_typeform.planner.time.monotonic", return_value=0)
+    def test_plan_with_rate_limit(self, mock_monotonic):
+        client = get_client({"form1": 1000})
+        config = {"start_date": START_DATE, "max_requests_per_second": 4, "stream_workers": 2}
+        sync_plan = planner.plan(client, config, {},
+                                 get_catalog(["forms", "questions", "unsubmitted_landings"]), ["form1"])
+
+        client.request.assert_called_once_with("https://api.typeform.com/forms/form1/responses",
+                                               {"page_size": 1, "since": 1656633600, "completed": False})
+        self.assertEqual(sync_plan["request_seconds"], 0.25)
+        self.assertEqual(sync_plan["streams"]["forms"], {"forms": 1, "requests": 1, "records": 0, "seconds": 0.25})
+        # Verify the streams synced concurrently share the time
+        self.assertEqual(sync_plan["seconds"], 0.375)
@@ -0,0 +1,115 @@
+import unittest
+from unittest import mock
+from parameterized import parameterized
+from tap_typeform import preflight
+from tap_typeform.sync import sync_streams
+
+
+SELECTED_STREAMS = ["questions", "submitted_landings", "answers"]
+STREAMS_TO_SYNC = ["questions", "submitted_landings"]
+START_DATE = "2022-07-01T00:00:00Z"
+
+
+def get_state(answers_bookmark="2022-07-05T06:53:30Z"):
+    return {"bookmarks": {
+        "submitted_landings": {"form1": {"submitted_at": "2022-07-05T06:53:30Z", "landing_ids": ["l1", "l2"]}},
+        "answers": {"form1": {"submitted_at": answers_bookmark, "landing_ids": ["l3"]}},
+    }}
+
+
+def get_client(total_items):
+    client = mock.Mock()
+    client.build_url.side_effect = lambda endpoint: "https://api.typeform.com/" + endpoint
+    client.request.return_value = {"total_items": total_items, "page_count": 1, "items": []}
+    return client
+
+
+class TestPreflight(unittest.TestCase):
+    """
+    Test that forms without new responses are found with a single count request.
+    """
+
+    @parameterized.expand([
+        ["no_responses", 0, True],
+        ["only_boundary_responses", 3, True],
+        ["new_responses", 4, False],
+    ])
+    def test_is_idle(self, name, total_items, expected):
+        client = get_client(total_items)
+        is_idle = preflight.is_idle(client, get_state(), "form1", SELECTED_STREAMS,
+                                    ["submitted_landings"], START_DATE)
+
+        self.assertEqual(is_idle, expected)
+        client.request.assert_called_once_with("https://api.typeform.com/forms/form1/responses",
+                                               {"page_size": 1, "since": 1657004010, "completed": True})
+
+    def test_submitted_after_bookmark(self):
+        """
+        Verify that a response landed before the bookmarks and submitted after them is found, each
+        responses stream being probed with its own `completed` filter.
+        """
+        state = {"bookmarks": {"submitted_landings": {"form1": {"submitted_at": "2022-07-05T00:00:00Z"}},
+                               "unsubmitted_landings": {"form1": {"landed_at": "2022-07-05T00:00:00Z"}}}}
+        response = {"landed_at": 1656892800, "submitted_at": 1657065600}
+
+        def count(url, params):
+            # `since` applies to the `submitted_at` of submitted responses, and the `landed_at` of the others
+            value = response["submitted_at"] if params.get("completed") else response["landed_at"]
+            return {"total_items": int(value >= params["since"]), "items": []}
+
+        client = get_client(0)
+        client.request.side_effect = count
+        is_idle = preflight.is_idle(client, state, "form1", ["submitted_landings", "unsubmitted_landings"],
+                                    ["unsubmitted_landings", "submitted_landings"], START_DATE)
+
+        self.assertFalse(is_idle)
+        self.assertEqual([call.args[1]["completed"] for call in client.request.mock_calls], [False, True])
+
+    def test_boundary_ids_of_min_bookmark(self):
+        """Verify that only the landing ids saved at the minimum bookmark are counted."""
+        since, landing_ids = preflight.get_since(get_state("2022-07-04T06:53:30Z"), "form1", SELECTED_STREAMS,
+                                                 ["submitted_landings"], START_DATE)
+
+        self.assertEqual(since, "2022-07-04T06:53:30Z")
+        self.assertEqual(landing_ids, {"l3"})
+
+    def test_form_without_bookmark(self):
+        """Verify that a form without bookmarks is counted from the start date."""
+        since, landing_ids = preflight.get_since({}, "form1", SELECTED_STREAMS, ["submitted_landings"], START_DATE)
+
+        self.assertEqual(since, START_DATE)
+        self.assertEqual(landing_ids, set())
+
+    def test_no_responses_streams(self):
+        client = get_client(0)
+        idle_forms = preflight.get_idle_forms(client, {}, ["form1"], ["questions"], ["questions"], START_DATE)
+
+        self.assertEqual(idle_forms, set())
+        client.request.assert_not_called()
+
+
+@mock.patch("tap_typeform.sync.write_schemas")
+@mock.patch("tap_typeform.streams.SubmittedLandings.sync_obj")
+@mock.patch("tap_typeform.streams.Questions.sync_obj")
+@mock.patch("tap_typeform.sync.preflight.get_idle_forms", return_value={"form1"})
+class TestSkipIdleForms(unittest.TestCase):
+    """
+    Test that the responses of idle forms are not requested when `skip_idle_forms` is set.
+    """
+
+    def sync(self, config):
+        sync_streams(mock.Mock(), {"start_date": START_DATE, **config}, {}, {"streams": []}, ["form1", "form2"],
+                     SELECTED_STREAMS, STREAMS_TO_SYNC, {})
+
+    def test_skip_idle_forms(self, mock_get_idle_forms, mock_questions, mock_landings, mock_write_schemas):
+        self.sync({"skip_idle_forms": True})
+
+        # Verify the questions of all the forms are synced, and the responses of the active form only
+        self.assertEqual([call.args[3] for call in mock_questions.mock_calls], ["form1", "form2"])
+        self.assertEqual([call.args[3] for call in mock_landings.mock_calls], ["form2"])
+
+    def test_preflight_disabled(self, mock_get_idle_forms, mock_questions, mock_landings, mock_write_schemas):
+        self.sync({})
+
+        mock_get_idle_forms.assert_not_called()
+        self.assertEqual([call.args[3] for call in mock_landings.mock_calls], ["form1", "form2"])
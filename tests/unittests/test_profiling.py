@@ -0,0 +1,83 @@
+import os
+import pstats
+import tempfile
+import time
+import unittest
+from parameterized import parameterized
+
+from tap_typeform import profiling
+
+
+def busy_wait(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+class TestProfileArgs(unittest.TestCase):
+    """
+    Test the parsing of the `--profile` argument and the `profile` config.
+    """
+
+    @parameterized.expand([
+        ["flag", ["tap", "--profile", "--config", "config.json"], True, ["tap", "--config", "config.json"]],
+        ["last_flag", ["tap", "--config", "config.json", "--profile"], True, ["tap", "--config", "config.json"]],
+        ["streams", ["tap", "--profile", "forms,answers", "-c", "c.json"], "forms,answers", ["tap", "-c", "c.json"]],
+        ["equals", ["tap", "--profile=run", "-c", "c.json"], "run", ["tap", "-c", "c.json"]],
+        ["absent", ["tap", "-c", "c.json"], None, ["tap", "-c", "c.json"]],
+    ])
+    def test_pop_profile_arg(self, name, argv, expected, expected_argv):
+        self.assertEqual(profiling.pop_profile_arg(argv), expected)
+        self.assertEqual(argv, expected_argv)
+
+    @parameterized.expand([
+        ["all", {"profile": True}, "submitted_landings", True],
+        ["all_string", {"profile": "true"}, "forms", True],
+        ["all_not_run", {"profile": True}, "run", False],
+        ["chosen", {"profile": "forms, submitted_landings"}, "submitted_landings", True],
+        ["not_chosen", {"profile": "forms"}, "submitted_landings", False],
+        ["list", {"profile": ["backfill"]}, "backfill", True],
+        ["run", {"profile": "run,forms"}, "run", True],
+        ["run_only", {"profile": "run,forms"}, "forms", False],
+        ["off", {}, "forms", False],
+        ["false", {"profile": "false"}, "forms", False],
+    ])
+    def test_is_profiled(self, name, config, profiled_name, expected):
+        self.assertEqual(profiling.is_profiled(config, profiled_name), expected)
+
+
+class TestProfile(unittest.TestCase):
+    """
+    Test that the profiles are written to a file per profiled name.
+    """
+
+    def test_not_profiled(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            with profiling.profile({"profile": "forms", "profile_dir": profile_dir}, "questions"):
+                busy_wait(0.001)
+            self.assertEqual(os.listdir(profile_dir), [])
+
+    def test_deterministic(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            with profiling.profile({"profile": True, "profile_dir": profile_dir, "shard": "1/2"}, "forms"):
+                busy_wait(0.001)
+
+            stats = pstats.Stats(os.path.join(profile_dir, "forms.shard1.prof"))
+            self.assertIn("busy_wait", {function for _, _, function in stats.stats})
+
+    def test_sampling(self):
+        config = {"profile": True, "profile_dir": "", "profile_mode": "sampling", "profile_interval": 0.001}
+        with tempfile.TemporaryDirectory() as profile_dir:
+            config["profile_dir"] = profile_dir
+            with profiling.profile(config, "submitted_landings"):
+                busy_wait(0.1)
+
+            with open(os.path.join(profile_dir, "submitted_landings.folded")) as profile_file:
+                lines = profile_file.read().splitlines()
+
+        # Verify the samples are collapsed stacks, outermost call first, with their count
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+        self.assertIn("test_profiling.py:busy_wait", stack.split(";")[-1])
+        self.assertIn("test_profiling.py:test_sampling", stack)
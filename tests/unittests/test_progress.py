@@ -0,0 +1,92 @@
+import unittest
+from unittest import mock
+from parameterized import parameterized
+
+from tap_typeform import progress
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgress(unittest.TestCase):
+    """
+    Test that the progress of the forms and of the sync is logged every interval.
+    """
+
+    @parameterized.expand([
+        ["half", 50, 100, 10, 10],
+        ["done", 100, 100, 10, 0],
+        ["not_started", 0, 100, 10, None],
+    ])
+    def test_get_eta(self, name, done, total, seconds, expected):
+        self.assertEqual(progress.get_eta(done, total, seconds), expected)
+
+    def test_format_seconds(self):
+        self.assertEqual(progress.format_seconds(3725.5), "1:02:05")
+        self.assertEqual(progress.format_seconds(None), "unknown")
+
+    @mock.patch("tap_typeform.progress.LOGGER.info")
+    def test_progress_logs(self, mock_info):
+        clock = FakeClock()
+        reporter = progress.ProgressReporter(60, clock)
+
+        clock.now = 10
+        reporter.add_page("submitted_landings", "form1", 1000, 4000)
+        reporter.add_page("submitted_landings", "form2", 100, 100)
+        reporter.finish_form("submitted_landings", "form2")
+        mock_info.assert_not_called()
+
+        # Verify the progress is logged once the interval passed
+        clock.now = 60
+        reporter.add_page("submitted_landings", "form1", 1000, 3000)
+        messages = [call.args[0] % call.args[1:] for call in mock_info.call_args_list]
+        self.assertEqual(messages, [
+            "Progress of stream submitted_landings - form: form1: 2000 of 4000 responses (50%), 40.0 responses/s, "
+            "0:00:50 left",
+            "Progress of the sync: 2100 of about 4100 responses (51%), 2 of 2 forms started, 1 finished, "
+            "35.0 responses/s, 0:00:57 left, 0:01:00 elapsed",
+        ])
+
+        mock_info.reset_mock()
+        clock.now = 90
+        reporter.add_page("submitted_landings", "form1", 1000, 2000)
+        mock_info.assert_not_called()
+
+    @mock.patch("tap_typeform.progress.LOGGER.info")
+    def test_queued_forms(self, mock_info):
+        clock = FakeClock()
+        reporter = progress.ProgressReporter(60, clock)
+        reporter.queue(10)
+        reporter.add_page("submitted_landings", "form1", 100, 100)
+        reporter.finish_form("submitted_landings", "form1")
+        reporter.add_page("submitted_landings", "form2", 100, 300)
+        clock.now = 60
+        reporter.log_progress()
+
+        # Verify the 8 forms not started are estimated with the average responses of the others
+        self.assertEqual(mock_info.call_args_list[-1].args[0] % mock_info.call_args_list[-1].args[1:],
+                         "Progress of the sync: 200 of about 2000 responses (10%), 2 of 10 forms started, 1 finished, "
+                         "3.3 responses/s, 0:09:00 left, 0:01:00 elapsed")
+
+    def test_total_grows_with_responses(self):
+        reporter = progress.ProgressReporter(60, FakeClock())
+        reporter.add_page("submitted_landings", "form1", 1000, 1000)
+        reporter.add_page("submitted_landings", "form1", 10, 1000)
+        self.assertEqual(reporter.forms[("submitted_landings", "form1")].total, 1010)
+
+    @parameterized.expand([
+        ["default", {}, 60],
+        ["interval", {"progress_interval_seconds": "30"}, 30],
+        ["off", {"progress_interval_seconds": 0}, None],
+    ])
+    def test_configure(self, name, config, expected):
+        progress.configure(config)
+        reporter = progress.get_reporter()
+        self.assertEqual(reporter.interval if reporter else None, expected)
+        progress.configure({"progress_interval_seconds": 0})
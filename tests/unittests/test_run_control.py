@@ -0,0 +1,112 @@
+import signal
+import unittest
+from unittest import mock
+from tap_typeform import run_control
+from tap_typeform.state_store import StateStore
+from tap_typeform.streams import SubmittedLandings
+from helpers import get_catalogs, get_response
+
+
+START_DATE = "2022-07-01T00:00:00Z"
+
+
+PAGES = {
+    None: [get_response("l4", "2022-07-05T04:00:00Z"), get_response("l3", "2022-07-05T03:00:00Z")],
+    "l3": [get_response("l2", "2022-07-05T02:00:00Z"), get_response("l1", "2022-07-05T01:00:00Z")],
+}
+
+
+def request(url, params):
+    """Return the page and stop the sync while the first page is being fetched."""
+    run_control.handle_signal(15, None)
+    tokens = list(PAGES)
+    before = params.get("before")
+    return {"items": PAGES[before], "page_count": len(tokens) - tokens.index(before)}
+
+
+class TestRunControl(unittest.TestCase):
+    """
+    Test that the sync stops on signals and once the run time is used.
+    """
+
+    def tearDown(self):
+        run_control.configure({})
+
+    def test_first_signal_stops(self):
+        run_control.configure({})
+        self.assertFalse(run_control.should_stop())
+        run_control.handle_signal(15, None)
+        self.assertTrue(run_control.should_stop())
+
+        # Verify the second signal exits
+        with self.assertRaises(SystemExit) as e:
+            run_control.handle_signal(2, None)
+        self.assertEqual(e.exception.code, 130)
+
+    def test_handlers_restored(self):
+        previous = signal.getsignal(signal.SIGTERM)
+        run_control.install_signal_handlers()
+        self.assertIs(signal.getsignal(signal.SIGTERM), run_control.handle_signal)
+
+        # Verify the handlers from before the sync are back after it
+        run_control.restore_signal_handlers()
+        self.assertIs(signal.getsignal(signal.SIGTERM), previous)
+        self.assertIs(signal.getsignal(signal.SIGINT), signal.default_int_handler)
+
+    @mock.patch("tap_typeform.run_control.time.monotonic")
+    def test_max_run_seconds(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        run_control.configure({"max_run_seconds": 60})
+        mock_monotonic.return_value = 159
+        self.assertFalse(run_control.should_stop())
+        mock_monotonic.return_value = 160
+        self.assertTrue(run_control.should_stop())
+
+
+@mock.patch("tap_typeform.state_store._store", new_callable=StateStore)
+@mock.patch("tap_typeform.output.write_record")
+class TestStoppedSync(unittest.TestCase):
+    """
+    Test that a stopped sync checkpoints the form in flight.
+    """
+
+    catalogs = get_catalogs()
+
+    def setUp(self):
+        run_control.configure({})
+
+    def tearDown(self):
+        run_control.configure({})
+
+    def sync(self, client, state):
+        SubmittedLandings().sync_obj(client, state, self.catalogs, "form1", START_DATE,
+                                     ["submitted_landings"], {"submitted_landings": 0})
+
+    def get_client(self):
+        client = mock.Mock(page_size=2)
+        client.build_url.side_effect = lambda endpoint: "https://api.typeform.com/" + endpoint
+        client.request.side_effect = request
+        return client
+
+    def test_checkpoint_current_page(self, mock_write_record, mock_store):
+        state = {}
+        client = self.get_client()
+        with mock.patch("tap_typeform.streams.LOGGER.info") as mock_info:
+            self.sync(client, state)
+
+        # Verify the stop is logged with its reason
+        mock_info.assert_any_call("Stopped stream submitted_landings - form: form1 with 1 pages left: received signal 15")
+        # Verify the current page is written and checkpointed, and the bookmark is not moved
+        self.assertEqual(client.request.call_count, 1)
+        self.assertEqual([call.args[1]["landing_id"] for call in mock_write_record.mock_calls], ["l4", "l3"])
+        self.assertNotIn("bookmarks", state)
+        self.assertEqual(state["page_checkpoints"]["submitted_landings"]["form1"]["before"], "l3")
+
+    def test_stopped_before_first_page(self, mock_write_record, mock_store):
+        state = {}
+        run_control.request_stop("test")
+        client = self.get_client()
+        self.sync(client, state)
+
+        self.assertEqual(client.request.call_count, 0)
+        self.assertEqual(state, {})
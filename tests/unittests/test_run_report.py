@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+from singer import utils
+from tap_typeform import phase_timers, run_report
+from tap_typeform.client import Client
+from tap_typeform.streams import Forms, SubmittedLandings
+from helpers import get_catalogs, get_response
+
+
+def get_mock_http_response(status_code, contents):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = contents.encode()
+    return response
+
+
+class TestRunReport(unittest.TestCase):
+    """
+    Test that the report sums the counters per stream and form.
+    """
+
+    def setUp(self):
+        run_report.reset()
+        phase_timers.reset()
+
+    def test_build(self):
+        run_report.add("submitted_landings", "form1", api_calls=2, pages=2, records_emitted=10)
+        run_report.add("submitted_landings", "form2", api_calls=1, pages=1, records_filtered=3)
+        run_report.add("forms", None, api_calls=1, records_emitted=2)
+        run_report.skip(None, "form3", "idle")
+
+        state_before = {"bookmarks": {"submitted_landings": {"form1": {"submitted_at": "2022-07-01T00:00:00Z"}}}}
+        state_after = {"bookmarks": {
+            "submitted_landings": {"form1": {"submitted_at": "2022-07-05T00:00:00Z", "landing_ids": ["l1"]},
+                                   "form2": {"submitted_at": "2022-07-02T00:00:00Z"}},
+            "forms": {"last_updated_at": "2022-07-03T00:00:00Z"}}}
+        report = run_report.get_report().build(state_before, state_after)
+
+        landings = report["streams"]["submitted_landings"]
+        self.assertEqual((landings["api_calls"], landings["pages"], landings["records_emitted"],
+                          landings["records_filtered"]), (3, 3, 10, 3))
+        self.assertEqual(landings["forms"]["form1"]["bookmark_before"], "2022-07-01T00:00:00Z")
+        self.assertEqual(landings["forms"]["form1"]["bookmark_after"], "2022-07-05T00:00:00Z")
+        self.assertIsNone(landings["forms"]["form2"]["bookmark_before"])
+        self.assertEqual(report["streams"]["forms"]["forms"][""]["bookmark_after"], "2022-07-03T00:00:00Z")
+        self.assertEqual(report["skipped_forms"], [{"stream": None, "form_id": "form3", "reason": "idle"}])
+
+    def test_failed_form(self):
+        with self.assertRaises(ValueError):
+            with run_report.track("questions", "form1"):
+                raise ValueError("bad form")
+
+        report = run_report.get_report().build({}, {})
+        self.assertEqual(report["failed_forms"], [{"stream": "questions", "form_id": "form1",
+                                                   "error": "ValueError: bad form"}])
+        self.assertGreaterEqual(report["streams"]["questions"]["forms"]["form1"]["duration_seconds"], 0)
+
+    def test_write(self):
+        run_report.add("questions", "form1", records_emitted=4)
+        phase_timers.add("questions", "form1", "fetch", 1.5)
+        with tempfile.TemporaryDirectory() as report_dir:
+            path = os.path.join(report_dir, "report.json")
+            run_report.write(path, {}, {}, utils.now(), "completed", {"questions": 4, "forms": 0})
+            with open(path) as report_file:
+                report = json.load(report_file)
+            self.assertEqual(os.listdir(report_dir), ["report.json"])
+
+        self.assertEqual(report["status"], "completed")
+        self.assertEqual(report["records_count"], {"questions": 4})
+        self.assertEqual(report["streams"]["questions"]["records_emitted"], 4)
+        # Verify the phase timings of each form are reported
+        self.assertEqual(report["streams"]["questions"]["phases"], {"fetch": 1.5})
+        self.assertEqual(report["streams"]["questions"]["forms"]["form1"]["phases"], {"fetch": 1.5})
+        self.assertEqual(report["failed_forms"], [])
+
+
+@mock.patch("time.sleep")
+@mock.patch("tap_typeform.client.requests.Session.get")
+@mock.patch("tap_typeform.output.write_record")
+class TestStreamReport(unittest.TestCase):
+    """
+    Test that the requests and records of the sync of a form are reported.
+    """
+
+    catalogs = get_catalogs()
+    selected_streams = ["submitted_landings", "answers"]
+
+    def setUp(self):
+        run_report.reset()
+
+    def sync_page(self, config, state):
+        test_stream = SubmittedLandings(config)
+        test_stream.start_form(Client({"token": "token"}, "", False), state, self.catalogs, "form1",
+                               "2022-07-01T00:00:00Z", self.selected_streams, {"submitted_landings": 0, "answers": 0})
+        test_stream.sync_page()
+        return run_report.get_report().build({}, state)["streams"]
+
+    def test_page_report(self, mock_write_record, mock_get, mock_sleep):
+        contents = json.dumps({"items": [get_response("l1", "2022-07-05T06:53:30Z", answers=2),
+                                         get_response("l2", "2022-07-03T06:53:30Z", answers=2)], "page_count": 1})
+        state = {"bookmarks": {"submitted_landings": {"form1": {"submitted_at": "2022-07-04T00:00:00Z"}},
+                               "answers": {"form1": {"submitted_at": "2022-07-01T00:00:00Z"}}}}
+        mock_get.side_effect = [get_mock_http_response(500, "{}"), get_mock_http_response(200, contents)]
+        streams = self.sync_page({}, state)
+
+        landings = streams["submitted_landings"]["forms"]["form1"]
+        self.assertEqual((landings["api_calls"], landings["retries"], landings["pages"]), (2, 1, 1))
+        self.assertEqual(landings["bytes"], len(contents) + 2)
+        self.assertEqual((landings["records_emitted"], landings["records_filtered"]), (1, 1))
+        answers = streams["answers"]["forms"]["form1"]
+        self.assertEqual((answers["records_emitted"], answers["records_filtered"]), (4, 0))
+
+    def test_requests_outside_forms(self, mock_write_record, mock_get, mock_sleep):
+        mock_get.return_value = get_mock_http_response(200, '{"items": []}')
+        Client({"token": "token"}, "", False).request("https://api.typeform.com/forms")
+        with phase_timers.context("forms", None):
+            Client({"token": "token"}, "", False).request("https://api.typeform.com/forms")
+
+        # Verify only the requests made while syncing a stream are reported
+        report = run_report.get_report().build({}, {})
+        self.assertEqual(list(report["streams"]), ["forms"])
+        self.assertEqual(report["streams"]["forms"]["api_calls"], 1)
+
+    def test_forms_pages(self, mock_write_record, mock_get, mock_sleep):
+        def get(url, params, **kwargs):
+            return get_mock_http_response(200, json.dumps({"items": [], "page_count": 4}))
+
+        mock_get.side_effect = get
+        # Listed before the sync, as for the forms to sync
+        list(Forms({"forms_page_workers": 3}).get_forms(Client({"token": "token"}, "", False)))
+        Forms({"forms_page_workers": 3}).sync_obj(Client({"token": "token"}, "", False), {}, self.catalogs,
+                                                  "2022-07-01T00:00:00Z", ["forms"], {"forms": 0})
+
+        # Verify the pages fetched by the worker threads are reported with the first one, and the listing
+        # outside the sync is not
+        report = run_report.get_report().build({}, {})
+        self.assertEqual(report["streams"]["forms"]["api_calls"], 4)
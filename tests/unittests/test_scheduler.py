@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+from parameterized import parameterized
+from singer import utils
+from tap_typeform import scheduler
+from tap_typeform.state_store import StateStore
+from tap_typeform.sync import sync_streams
+
+
+NOW = utils.strptime_to_utc("2022-07-05T12:00:00Z")
+START_DATE = "2022-07-01T00:00:00Z"
+
+
+class TestScheduler(unittest.TestCase):
+    """
+    Test that forms are synced according to their response rate.
+    """
+
+    @parameterized.expand([
+        ["never_synced", None, True],
+        ["first_synced", {"last_synced": "2022-07-05T11:59:00Z"}, True],
+        ["hot_form", {"last_synced": "2022-07-05T11:59:00Z", "rate": 1000}, True],
+        ["next_response_due", {"last_synced": "2022-07-05T09:00:00Z", "rate": 0.5}, True],
+        ["next_response_not_due", {"last_synced": "2022-07-05T09:00:00Z", "rate": 0.1}, False],
+        ["inactive_form", {"last_synced": "2022-07-05T00:00:00Z", "rate": 0}, False],
+        ["stale_form", {"last_synced": "2022-07-04T11:00:00Z", "rate": 0}, True],
+    ])
+    def test_is_due(self, name, activity, expected):
+        self.assertEqual(scheduler.is_due(activity, NOW, 24), expected)
+
+    def test_get_due_forms(self):
+        state = {"form_activity": {
+            "form1": {"last_synced": "2022-07-05T00:00:00Z", "rate": 0},
+            "form2": {"last_synced": "2022-07-03T00:00:00Z", "rate": 0},
+        }}
+
+        # Verify the max staleness can be set in the config
+        self.assertEqual(scheduler.get_due_forms(state, ["form1", "form2", "form3"], {}, NOW), {"form2", "form3"})
+        self.assertEqual(scheduler.get_due_forms(state, ["form1", "form2", "form3"],
+                                                 {"scheduler_max_staleness_hours": 12}, NOW),
+                         {"form1", "form2", "form3"})
+
+    @mock.patch("tap_typeform.scheduler.state_store._store", new_callable=StateStore)
+    def test_record_activity(self, mock_store):
+        state = {}
+        # The history fetched by the first sync gives no rate
+        scheduler.record_activity(state, "form1", 10000, NOW)
+        self.assertEqual(state["form_activity"]["form1"], {"last_synced": "2022-07-05T12:00:00.000000Z"})
+
+        # The rate is measured from the previous sync, then smoothed
+        scheduler.record_activity(state, "form1", 2, utils.strptime_to_utc("2022-07-05T13:00:00Z"))
+        self.assertEqual(state["form_activity"]["form1"], {"last_synced": "2022-07-05T13:00:00.000000Z", "rate": 2.0})
+        scheduler.record_activity(state, "form1", 0, utils.strptime_to_utc("2022-07-05T14:00:00Z"))
+        self.assertEqual(state["form_activity"]["form1"], {"last_synced": "2022-07-05T14:00:00.000000Z", "rate": 1.0})
+        self.assertEqual(mock_store.value_changes, {"form_activity"})
+
+
+@mock.patch("tap_typeform.sync.utils.now", return_value=NOW)
+@mock.patch("tap_typeform.sync.write_schemas")
+@mock.patch("tap_typeform.streams.SubmittedLandings.sync_obj")
+@mock.patch("tap_typeform.streams.Questions.sync_obj")
+@mock.patch("tap_typeform.sync.scheduler.state_store._store", new_callable=StateStore)
+class TestAdaptiveScheduling(unittest.TestCase):
+    """
+    Test that only the due forms are synced with `adaptive_scheduling`.
+    """
+
+    def test_sync_due_forms(self, mock_store, mock_questions, mock_landings, mock_write_schemas, mock_now):
+        state = {"form_activity": {"form1": {"last_synced": "2022-07-05T11:00:00Z", "rate": 0}}}
+        sync_streams(mock.Mock(), {"start_date": START_DATE, "adaptive_scheduling": True}, state, {"streams": []},
+                     ["form1", "form2"], ["questions", "submitted_landings"], ["questions", "submitted_landings"], {})
+
+        # Verify the questions of all the forms are synced, and the responses of the due form only
+        self.assertEqual([call.args[3] for call in mock_questions.mock_calls], ["form1", "form2"])
+        self.assertEqual([call.args[3] for call in mock_landings.mock_calls], ["form2"])
+
+        # Verify the activity of the skipped form is kept
+        self.assertEqual(state["form_activity"]["form1"], {"last_synced": "2022-07-05T11:00:00Z", "rate": 0})
+        self.assertEqual(state["form_activity"]["form2"]["last_synced"], "2022-07-05T12:00:00.000000Z")
@@ -0,0 +1,160 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from parameterized import parameterized
+from tap_typeform import shard, utils
+from tap_typeform.client import Client
+from tap_typeform.state_store import StateStore
+
+
+FORMS = ["form{}".format(number) for number in range(20)]
+
+
+class TestShardAssignment(unittest.TestCase):
+    """
+    Test that the forms are split into stable and disjoint shards.
+    """
+
+    @parameterized.expand([
+        ["first", "0/3", (0, 3)],
+        ["last", "2/3", (2, 3)],
+    ])
+    def test_parse_shard(self, name, value, expected):
+        self.assertEqual(shard.parse_shard(value), expected)
+
+    @parameterized.expand([["out_of_range", "3/3"], ["negative", "-1/3"], ["not_a_shard", "a/b"], ["no_count", "1"]])
+    def test_invalid_shard(self, name, value):
+        with self.assertRaises(Exception) as e:
+            shard.parse_shard(value)
+
+        self.assertEqual(str(e.exception), "Invalid shard {}, it should be i/N with 0 <= i < N.".format(value))
+
+    @parameterized.expand([
+        ["separate", ["--config", "config.json", "--shard", "1/4", "--state", "state.json"]],
+        ["equals", ["--config", "config.json", "--shard=1/4", "--state", "state.json"]],
+    ])
+    def test_pop_shard_arg(self, name, argv):
+        self.assertEqual(shard.pop_shard_arg(argv), "1/4")
+        self.assertEqual(argv, ["--config", "config.json", "--state", "state.json"])
+
+    @parameterized.expand([["hash", None], ["weights", {"form1": 100, "form2": 50, "form3": 2}]])
+    def test_disjoint_shards(self, name, weights):
+        shards = [shard.assign_forms(FORMS, index, 3, weights) for index in range(3)]
+
+        # Verify every form is in exactly one shard, whatever the order of the forms
+        self.assertEqual(sorted(form_id for shard_forms in shards for form_id in shard_forms), sorted(FORMS))
+        self.assertEqual(shards, [shard.assign_forms(list(reversed(FORMS)), index, 3, weights) for index in range(3)])
+
+    def test_weighted_shards(self):
+        weights = {"form1": 10, "form2": 6, "form3": 4}
+
+        # Verify the heaviest form is alone in its shard
+        self.assertEqual(shard.assign_forms(["form1", "form2", "form3"], 0, 2, weights), {"form1"})
+        self.assertEqual(shard.assign_forms(["form1", "form2", "form3"], 1, 2, weights), {"form2", "form3"})
+
+
+class TestShardState(unittest.TestCase):
+    """
+    Test that the states of the shards are namespaced and merged.
+    """
+
+    @mock.patch("tap_typeform.state_store.output.write_state")
+    def test_namespaced_state(self, mock_write_state):
+        store = StateStore()
+        store.namespace = "0/2"
+        store.excluded_forms = {"form2"}
+        store.write_state({"bookmarks": {"answers": {"form1": {"submitted_at": "2022-07-05T00:00:00Z"},
+                                                     "form2": {"submitted_at": "2022-07-01T00:00:00Z"}}}})
+
+        # Verify the forms of the other shards are not written by the shard
+        mock_write_state.assert_called_once_with(
+            {"shards": {"0/2": {"bookmarks": {"answers": {"form1": {"submitted_at": "2022-07-05T00:00:00Z"}}}}}})
+
+    def test_merge_and_flatten(self):
+        states = [
+            {"shards": {"0/2": {"bookmarks": {"forms": {"last_updated_at": "2022-07-05T00:00:00Z"},
+                                              "answers": {"form1": {"submitted_at": "2022-07-05T00:00:00Z"}}}}}},
+            {"shards": {"1/2": {"bookmarks": {"forms": {"last_updated_at": "2022-07-01T00:00:00Z"},
+                                              "answers": {"form2": {"submitted_at": "2022-07-06T00:00:00Z"}}}}}},
+        ]
+        merged = shard.merge_states(states)
+        self.assertEqual(sorted(merged["shards"]), ["0/2", "1/2"])
+
+        # Verify the flat state has the bookmarks of all the shards, and the most recent shared bookmark
+        self.assertEqual(shard.flatten_state(merged), {"bookmarks": {
+            "forms": {"last_updated_at": "2022-07-05T00:00:00Z"},
+            "answers": {"form1": {"submitted_at": "2022-07-05T00:00:00Z"},
+                        "form2": {"submitted_at": "2022-07-06T00:00:00Z"}},
+        }})
+
+    def test_activity_weights(self):
+        states = [
+            {"shards": {"0/2": {"form_activity": {"form1": {"last_synced": "2022-07-05T00:00:00Z", "rate": 9}}}}},
+            {"shards": {"1/2": {"form_activity": {"form2": {"last_synced": "2022-07-05T00:00:00Z", "rate": 3}}}}},
+        ]
+        merged = shard.merge_states(states)
+        config = {"shard": "0/2", "shard_balance": "activity"}
+
+        # Verify the shards given the merged state use its weights
+        self.assertEqual(merged["shard_weights"]["weights"], {"form1": 10, "form2": 4})
+        self.assertEqual(shard.get_shard_forms(config, shard.flatten_state(merged), ["form1", "form2", "form3"]),
+                         ["form1"])
+
+        # Verify a state without the weights of a merge, or with modified weights, falls back to the hash
+        for state in [shard.flatten_state(states[0]),
+                      {**merged, "shard_weights": {**merged["shard_weights"], "weights": {"form1": 1}}}]:
+            self.assertEqual(shard.get_shard_forms(config, state, FORMS),
+                             [form_id for form_id in FORMS if form_id in shard.assign_forms(FORMS, 0, 2)])
+
+    @mock.patch("tap_typeform.state_store.output.write_state")
+    def test_weights_not_namespaced(self, mock_write_state):
+        store = StateStore()
+        store.namespace = "0/2"
+        store.write_state({"bookmarks": {}, "shard_weights": {"weights": {"form1": 10}, "digest": ""}})
+
+        mock_write_state.assert_called_once_with({"shards": {"0/2": {"bookmarks": {}}}})
+
+
+class TestSharedConfigRefresh(unittest.TestCase):
+    """
+    Test that the token refresh of a process does not reuse a refresh token exchanged by another one.
+    """
+
+    def setUp(self):
+        config_file = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        json.dump({"token": "new_access_token", "refresh_token": "new_refresh_token"}, config_file)
+        config_file.close()
+        self.config_path = config_file.name
+
+    def tearDown(self):
+        for path in (self.config_path, self.config_path + ".lock"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    @mock.patch("tap_typeform.client.requests.Session.post")
+    def test_use_refreshed_tokens(self, mock_post):
+        config = {"token": "old_access_token", "refresh_token": "old_refresh_token"}
+        client = Client(config, self.config_path, False)
+
+        mock_post.assert_not_called()
+        self.assertEqual(client.refresh_token, "new_refresh_token")
+        self.assertEqual(client.access_token, "new_access_token")
+
+    def test_write_config_keeps_mode(self):
+        os.chmod(self.config_path, 0o644)
+        utils.write_config(self.config_path, {"token": "refreshed_access_token"})
+
+        self.assertEqual(os.stat(self.config_path).st_mode & 0o777, 0o644)
+        self.assertEqual(utils.read_config(self.config_path)["token"], "refreshed_access_token")
+
+    @mock.patch("tap_typeform.utils.os.replace", side_effect=OSError(16, "Device or resource busy"))
+    def test_write_config_in_place(self, mock_replace):
+        config_dir = os.path.dirname(self.config_path)
+        temp_files = set(os.listdir(config_dir))
+        utils.write_config(self.config_path, {"token": "refreshed_access_token"})
+
+        self.assertEqual(utils.read_config(self.config_path)["token"], "refreshed_access_token")
+        # Verify the temporary file is removed
+        self.assertEqual(set(os.listdir(config_dir)), temp_files)
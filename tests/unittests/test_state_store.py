@@ -0,0 +1,256 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from tap_typeform import state_store
+from tap_typeform.state_store import StateStore, SQLiteStateStore, merge_bookmark
+from tap_typeform.streams import write_bookmarks
+
+
+@mock.patch("tap_typeform.state_store.output.write_state")
+class TestStateStore(unittest.TestCase):
+    """
+    Test the in memory state store.
+    """
+
+    def test_checkpoint_full_state(self, mock_write_state):
+        """
+        Test that the whole state is emitted at the checkpoint.
+        """
+        state = {"bookmarks": {"answers": {"form1": {"submitted_at": "2022-07-05T06:53:30Z"}}}}
+        store = StateStore()
+        store.record_bookmark("answers", "form1")
+        store.checkpoint(state)
+
+        mock_write_state.assert_called_once_with(state)
+
+    def test_checkpoint_every(self, mock_write_state):
+        """
+        Test that the checkpoint is emitted once enough bookmarks were updated.
+        """
+        state = {"bookmarks": {}}
+        store = StateStore(checkpoint_every=2)
+        store.record_bookmark("answers", "form1")
+        store.checkpoint(state)
+        self.assertEqual(mock_write_state.call_count, 0)
+
+        store.record_bookmark("answers", "form2")
+        store.checkpoint(state)
+        self.assertEqual(mock_write_state.call_count, 1)
+
+    def test_skip_unchanged_checkpoint(self, mock_write_state):
+        """
+        Test that no STATE message is emitted when no bookmark was updated.
+        """
+        store = StateStore()
+        store.checkpoint({"bookmarks": {}})
+        store.checkpoint({"bookmarks": {}}, force=True)
+
+        self.assertEqual(mock_write_state.call_count, 0)
+
+    @mock.patch("tap_typeform.state_store.time.monotonic")
+    def test_checkpoint_seconds(self, mock_monotonic, mock_write_state):
+        """
+        Test that the updates are merged until the checkpoint interval passed.
+        """
+        mock_monotonic.return_value = 0
+        state = {"bookmarks": {}}
+        store = StateStore(checkpoint_seconds=60)
+        store.record_bookmark("answers", "form1")
+        store.checkpoint(state)
+        store.record_bookmark("answers", "form2")
+        mock_monotonic.return_value = 30
+        store.checkpoint(state)
+        self.assertEqual(mock_write_state.call_count, 0)
+
+        mock_monotonic.return_value = 61
+        store.checkpoint(state)
+        self.assertEqual(mock_write_state.call_count, 1)
+
+    @mock.patch("tap_typeform.state_store.output.records_written")
+    def test_checkpoint_records(self, mock_records_written, mock_write_state):
+        """
+        Test that the checkpoint is emitted once enough records were written.
+        """
+        mock_records_written.return_value = 0
+        state = {"bookmarks": {}}
+        store = StateStore(checkpoint_records=1000)
+        store.record_bookmark("answers", "form1")
+        mock_records_written.return_value = 999
+        store.checkpoint(state)
+        self.assertEqual(mock_write_state.call_count, 0)
+
+        mock_records_written.return_value = 1000
+        store.checkpoint(state)
+        self.assertEqual(mock_write_state.call_count, 1)
+
+    def test_flush(self, mock_write_state):
+        """
+        Test that the pending updates are emitted by flush.
+        """
+        state = {"bookmarks": {}}
+        store = StateStore(checkpoint_every=10)
+        store.record_bookmark("answers", "form1")
+        store.checkpoint(state)
+        store.flush()
+
+        mock_write_state.assert_called_once_with(state)
+
+
+class TestWriteBookmarks(unittest.TestCase):
+    """
+    Test that only the advanced bookmarks are recorded.
+    """
+
+    @mock.patch("tap_typeform.state_store._store", StateStore())
+    def test_unchanged_bookmark(self):
+        state = {"bookmarks": {"submitted_landings": {"form1": {"submitted_at": "2022-07-05T06:53:30Z"}}}}
+        write_bookmarks("submitted_landings", ["submitted_landings", "answers"], "form1", "2022-07-05T06:53:30Z", state)
+
+        # Verify only the bookmark of the child is recorded as updated
+        self.assertEqual(state_store.get_store().changes, {"answers": {"form1"}})
+
+
+@mock.patch("tap_typeform.state_store.output.write_state")
+class TestSQLiteStateStore(unittest.TestCase):
+    """
+    Test the SQLite state store.
+    """
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "state.db")
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_compact_checkpoint(self, mock_write_state):
+        """
+        Test that the checkpoint contains only the updated bookmarks.
+        """
+        state = {"bookmarks": {"answers": {"form1": {"submitted_at": "2022-07-05T06:53:30Z"},
+                                           "form2": {"submitted_at": "2022-07-01T06:53:30Z"}}}}
+        store = SQLiteStateStore(self.path)
+        store.load(state)
+        store.record_bookmark("answers", "form2")
+        store.checkpoint(state)
+
+        mock_write_state.assert_called_once_with(
+            {"state_db": state["state_db"], "bookmarks": {"answers": {"form2": {"submitted_at": "2022-07-01T06:53:30Z"}}}})
+
+        # Verify the full state is emitted when the store is closed
+        store.close(state)
+        self.assertEqual(mock_write_state.mock_calls[-1], mock.call(state))
+
+    def sync(self, state, updates):
+        store = state_store.configure({"state_backend": "sqlite", "state_db_path": self.path}, state)
+        for stream_name, key, value in updates:
+            state["bookmarks"].setdefault(stream_name, {})[key] = value
+            store.record_bookmark(stream_name, key)
+            store.checkpoint(state)
+        return store
+
+    @mock.patch("tap_typeform.state_store._store", StateStore())
+    def test_load_missing_bookmarks(self, mock_write_state):
+        """
+        Test that the bookmarks missing from a compact state emitted with the database are loaded.
+        """
+        self.sync({}, [("answers", "form1", {"submitted_at": "2022-07-05T06:53:30Z"}),
+                       ("forms", "last_updated_at", "2022-07-01T00:00:00Z")])
+
+        # Resumed from the last compact checkpoint of the interrupted run
+        new_state = mock_write_state.mock_calls[-1].args[0]
+        self.assertEqual(new_state["bookmarks"], {"forms": {"last_updated_at": "2022-07-01T00:00:00Z"}})
+        self.sync(new_state, [])
+
+        self.assertEqual(new_state["bookmarks"], {"answers": {"form1": {"submitted_at": "2022-07-05T06:53:30Z"}},
+                                                  "forms": {"last_updated_at": "2022-07-01T00:00:00Z"}})
+
+    @mock.patch("tap_typeform.state_store._store", StateStore())
+    def test_compact_values(self, mock_write_state):
+        """
+        Test that the compact checkpoints only hold the updated state values, and the others are loaded.
+        """
+        store = self.sync({"bookmarks": {}, "form_activity": {"form1": {"rate": 1.0}}},
+                          [("answers", "form1", {"submitted_at": "2022-07-05T06:53:30Z"})])
+        store.state["form_activity"]["form1"]["rate"] = 2.0
+        store.record_value("form_activity")
+        store.record_bookmark("answers", "form1")
+        store.checkpoint(store.state)
+        store.record_bookmark("answers", "form1")
+        store.checkpoint(store.state)
+
+        states = [call.args[0] for call in mock_write_state.mock_calls]
+        self.assertEqual([set(state) for state in states], [{"state_db", "bookmarks"},
+                                                            {"state_db", "bookmarks", "form_activity"},
+                                                            {"state_db", "bookmarks"}])
+
+        # Verify the next run resumed from the last compact checkpoint has the updated value
+        new_state = states[-1]
+        self.sync(new_state, [])
+        self.assertEqual(new_state["form_activity"], {"form1": {"rate": 2.0}})
+
+    @mock.patch("tap_typeform.state_store._store", StateStore())
+    def test_rewound_bookmark(self, mock_write_state):
+        """
+        Test that a bookmark rewound in the state is kept over the newer one of the database.
+        """
+        store = self.sync({}, [("answers", "form1", {"submitted_at": "2022-07-05T06:53:30Z"})])
+        state = store.state
+        store.close(state)
+
+        state["bookmarks"]["answers"]["form1"] = {"submitted_at": "2022-07-01T00:00:00Z"}
+        self.sync(state, [])
+
+        self.assertEqual(state["bookmarks"], {"answers": {"form1": {"submitted_at": "2022-07-01T00:00:00Z"}}})
+
+    @mock.patch("tap_typeform.state_store._store", StateStore())
+    def test_unknown_database(self, mock_write_state):
+        """
+        Test that the bookmarks of a database the state was not emitted with are discarded.
+        """
+        store = self.sync({}, [("answers", "form1", {"submitted_at": "2022-07-05T06:53:30Z"})])
+        store.close(store.state)
+
+        state = {"bookmarks": {"answers": {"form2": {"submitted_at": "2022-07-02T00:00:00Z"}}}}
+        store = self.sync(state, [])
+        store.close(state)
+
+        self.assertEqual(state["bookmarks"], {"answers": {"form2": {"submitted_at": "2022-07-02T00:00:00Z"}}})
+        # Verify the new id of the database is emitted with the state
+        self.assertEqual(mock_write_state.mock_calls[-1].args[0]["state_db"], {self.path: state["state_db"][self.path]})
+
+    def test_path_required(self, mock_write_state):
+        with self.assertRaises(Exception) as e:
+            state_store.configure({"state_backend": "sqlite"}, {})
+
+        self.assertEqual(str(e.exception), "The `sqlite` state backend requires a `state_db_path`.")
+
+
+class TestMergeBookmark(unittest.TestCase):
+    """
+    Test `merge_bookmark` function.
+    """
+
+    def test_merge(self):
+        self.assertEqual(merge_bookmark({"submitted_at": "2022-07-01T00:00:00Z"}, {"submitted_at": "2022-07-02T00:00:00Z"}),
+                         {"submitted_at": "2022-07-02T00:00:00Z"})
+        self.assertEqual(merge_bookmark(None, "2022-07-02T00:00:00Z"), "2022-07-02T00:00:00Z")
+
+
+@mock.patch("tap_typeform.state_store.output.write_state")
+class TestStateValues(unittest.TestCase):
+    """
+    Test that updated state values other than bookmarks are emitted.
+    """
+
+    def test_value_emitted_at_close(self, mock_write_state):
+        state = {"bookmarks": {}, "form_activity": {}}
+        store = StateStore()
+        store.record_value("form_activity")
+
+        # Verify the update does not make a checkpoint due, but is emitted at the end of the sync
+        store.checkpoint(state)
+        self.assertEqual(mock_write_state.call_count, 0)
+        store.close(state)
+        mock_write_state.assert_called_once_with(state)
@@ -0,0 +1,98 @@
+import json
+import threading
+import unittest
+from unittest import mock
+from tap_typeform import output, run_control
+from tap_typeform.client import RateLimiter
+from tap_typeform.sync import sync_streams
+
+
+START_DATE = "2022-07-01T00:00:00Z"
+SELECTED_STREAMS = ["questions", "submitted_landings", "unsubmitted_landings"]
+
+
+@mock.patch("tap_typeform.sync.write_schemas")
+class TestStreamConcurrency(unittest.TestCase):
+    """
+    Test that the streams of the forms are synced concurrently with `stream_workers`.
+    """
+
+    def tearDown(self):
+        run_control.configure({})
+
+    def sync(self, config, sync_obj):
+        with mock.patch("tap_typeform.streams.Questions.sync_obj", sync_obj), \
+                mock.patch("tap_typeform.streams.SubmittedLandings.sync_obj", sync_obj), \
+                mock.patch("tap_typeform.streams.UnsubmittedLandings.sync_obj", sync_obj):
+            sync_streams(mock.Mock(), {"start_date": START_DATE, **config}, {}, {"streams": []}, ["form1", "form2"],
+                         SELECTED_STREAMS, SELECTED_STREAMS, {})
+
+    def test_concurrent_streams(self, mock_write_schemas):
+        # Every stream waits for the two others on its first form, which only passes if they run concurrently
+        barrier = threading.Barrier(3, timeout=5)
+        synced = []
+
+        def sync_obj(stream_obj, client, state, catalogs, form_id, *args):
+            if form_id == "form1":
+                barrier.wait()
+            synced.append((stream_obj.tap_stream_id, form_id))
+
+        self.sync({"stream_workers": 3}, sync_obj)
+
+        self.assertEqual(sorted(synced), sorted((stream, form_id) for stream in SELECTED_STREAMS
+                                                for form_id in ["form1", "form2"]))
+        # Verify the forms of each stream are still synced in order
+        for stream in SELECTED_STREAMS:
+            self.assertEqual([form_id for name, form_id in synced if name == stream], ["form1", "form2"])
+
+    def test_failed_stream_stops_others(self, mock_write_schemas):
+        synced = []
+
+        def sync_obj(stream_obj, client, state, catalogs, form_id, *args):
+            if stream_obj.tap_stream_id == "questions":
+                raise Exception("Questions failed")
+            synced.append((stream_obj.tap_stream_id, form_id))
+
+        with self.assertRaises(Exception) as e:
+            self.sync({"stream_workers": 3}, sync_obj)
+
+        self.assertEqual(str(e.exception), "Questions failed")
+        self.assertTrue(run_control.should_stop())
+
+
+class TestRateLimiter(unittest.TestCase):
+    """
+    Test that the requests of all the threads are spaced by the rate limit.
+    """
+
+    @mock.patch("tap_typeform.client.time.sleep")
+    @mock.patch("tap_typeform.client.time.monotonic", return_value=100)
+    def test_rate_limit(self, mock_monotonic, mock_sleep):
+        rate_limiter = RateLimiter(2)
+        for _ in range(3):
+            rate_limiter.wait()
+
+        self.assertEqual([call.args[0] for call in mock_sleep.mock_calls], [0.5, 1.0])
+
+
+class TestConcurrentOutput(unittest.TestCase):
+    """
+    Test that the messages written by concurrent streams are not interleaved.
+    """
+
+    def test_concurrent_records(self):
+        def write(stream_name):
+            for number in range(500):
+                output.write_record(stream_name, {"id": number, "text": "x" * 100})
+
+        with output.capture() as buffer:
+            threads = [threading.Thread(target=write, args=(stream_name,)) for stream_name in SELECTED_STREAMS]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        messages = [json.loads(line) for line in buffer.getvalue().splitlines()]
+        for stream_name in SELECTED_STREAMS:
+            self.assertEqual([message["record"]["id"] for message in messages if message["stream"] == stream_name],
+                             list(range(500)))
@@ -145,7 +145,7 @@ class TestGetselectedStreams(unittest.TestCase):
         # Verify that the selected stream list is as expected
         self.assertCountEqual(selected_list, expected_list)
 
-@mock.patch("singer.write_schema")
+@mock.patch("tap_typeform.sync.output.write_schema")
 class TestWriteSchemas(unittest.TestCase):
     """
     Test `write_schemas` that it writes schemas for selected stream.
@@ -76,7 +76,8 @@ class TestFullTableStream(unittest.TestCase):
         mock_write_records.assert_called_with(
             get_stream_catalog("questions", True),
             "questions",
-            expected_records
+            expected_records,
+            "form1"
         )
 
 
@@ -110,7 +111,7 @@ class TestIncrementalStream(unittest.TestCase):
         # Verify that write_records was called for both the page
         self.assertEqual(mock_write_records.call_count,2)
 
-    @mock.patch("tap_typeform.streams.singer.write_record")
+    @mock.patch("tap_typeform.output.write_record")
     @mock.patch("tap_typeform.streams.Stream.sync_child_stream")
     def test_write_records(self, mock_sync_child, mock_write_record, mock_add_field, mock_request):
         """